@@ -0,0 +1,74 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+
+from recipes.models import Ingredient
+from recipes.versions import get_version
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = ({}, [], [])
+
+    def build(self):
+        ingredients = {}
+        names = []
+        words = []
+        for ingredient in Ingredient.objects.order_by().iterator():
+            ingredients[ingredient.id] = ingredient
+            key = ingredient.name.casefold()
+            names.append((key, ingredient.id))
+            for position in range(1, len(key)):
+                if key[position].isalnum() and not key[position - 1].isalnum():
+                    words.append((key[position:], ingredient.id))
+        names.sort()
+        words.sort()
+        return ingredients, names, words
+
+    def refresh(self):
+        version = get_version('ingredients')
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.data = self.build()
+                    self.version = version
+        return self.data
+
+    def search(self, query, limit):
+        query = query.casefold()
+        ingredients, names, words = self.refresh()
+        found = {}
+        for entries in (names, words):
+            position = bisect_left(entries, (query,))
+            while (len(found) < limit and position < len(entries)
+                   and entries[position][0].startswith(query)):
+                ingredient_id = entries[position][1]
+                found.setdefault(ingredient_id, ingredients[ingredient_id])
+                position += 1
+        result = list(found.values())
+        if len(result) < limit:
+            result.extend(Ingredient.objects.filter(
+                name__icontains=query
+            ).exclude(id__in=found)[:limit - len(result)])
+        return result
+
+
+def search_database(query, limit):
+    return Ingredient.objects.filter(name__icontains=query).annotate(
+        rank=Case(When(name__istartswith=query, then=Value(0)),
+                  default=Value(1), output_field=IntegerField())
+    ).order_by('rank', 'name')[:limit]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(query, limit):
+    if getattr(settings, 'INGREDIENT_AUTOCOMPLETE_INDEX', True):
+        return ingredient_index.search(query, limit)
+    return list(search_database(query, limit))
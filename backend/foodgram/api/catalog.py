@@ -0,0 +1,39 @@
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from recipes.models import Ingredient, Tag
+from recipes.versions import get_versions
+
+catalog_bundles = {}
+
+
+def build_catalog():
+    data = {
+        'tags': list(Tag.objects.values('id', 'name', 'color', 'slug')),
+        'ingredients': list(Ingredient.objects.values(
+            'id', 'name', 'measurement_unit'
+        )),
+    }
+    version = hashlib.sha256(
+        json.dumps(data, sort_keys=True).encode()
+    ).hexdigest()[:16]
+    content = json.dumps(
+        {'version': version, **data}, ensure_ascii=False,
+        separators=(',', ':')
+    ).encode()
+    return version, content, gzip.compress(content, compresslevel=9)
+
+
+def get_catalog():
+    key = 'catalog:{}:{}'.format(*get_versions('tags', 'ingredients'))
+    if key not in catalog_bundles:
+        bundle = cache.get(key)
+        if bundle is None:
+            bundle = build_catalog()
+            cache.set(key, bundle, None)
+        catalog_bundles.clear()
+        catalog_bundles[key] = bundle
+    return catalog_bundles[key]
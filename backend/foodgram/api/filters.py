@@ -1,6 +1,55 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
+from django_filters.fields import MultipleChoiceField
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe
+from recipes.models import Favorite, Ingredient, Recipe, Shopping, Tag
+from recipes.search import (cookable_with, search_recipes, with_ingredients,
+                            without_ingredients)
+from recipes.versions import get_version
+
+tag_id_maps = {}
+
+
+def get_tag_ids(*slugs):
+    key = f'tag-ids:{get_version("tags")}'
+    if key not in tag_id_maps:
+        tag_id_maps.clear()
+        tag_id_maps[key] = cache.get_or_set(
+            key, lambda: dict(Tag.objects.values_list('slug', 'id')), None
+        )
+    if any(slug not in tag_id_maps[key] for slug in slugs):
+        tag_id_maps[key] = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_id_maps[key], None)
+    return tag_id_maps[key]
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
+
+class TagSlugField(MultipleChoiceField):
+
+    def clean(self, value):
+        value = self.to_python(value)
+        if not value:
+            if self.required:
+                raise ValidationError(self.error_messages['required'],
+                                      code='required')
+            return value
+        tag_ids = get_tag_ids(*value)
+        for slug in value:
+            if slug not in tag_ids:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice', params={'value': slug}
+                )
+        return [tag_ids[slug] for slug in value]
+
+
+class TagFilter(filters.MultipleChoiceFilter):
+    field_class = TagSlugField
 
 
 class IngredientFilter(FilterSet):
@@ -11,23 +60,71 @@ class IngredientFilter(FilterSet):
         fields = ['name']
 
 
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagFilter(choices=tag_choices, method='get_tags')
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ingredients = NumberInFilter(method='get_ingredients')
+    exclude_ingredients = NumberInFilter(method='get_exclude_ingredients')
+    have = NumberInFilter(method='get_have')
+    max_missing = filters.NumberFilter(method='get_max_missing',
+                                       min_value=0)
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'search', 'ingredients', 'exclude_ingredients', 'have',
+                  'max_missing')
 
-    def get_is_favorited(self, queryset, name, value):
-        if value:
-            return queryset.filter(users_favorite__user=self.request.user)
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=value
+        )))
+
+    def get_search(self, queryset, name, value):
+        value = value.strip()
+        return search_recipes(queryset, value) if value else queryset
+
+    def get_ingredients(self, queryset, name, value):
+        if not value:
+            return queryset
+        return with_ingredients(queryset, sorted({int(pk) for pk in value}))
+
+    def get_exclude_ingredients(self, queryset, name, value):
+        if not value:
+            return queryset
+        return without_ingredients(queryset, [int(pk) for pk in value])
+
+    def get_have(self, queryset, name, value):
+        if not value:
+            return queryset
+        max_missing = self.form.cleaned_data.get('max_missing') or 0
+        return cookable_with(queryset, sorted({int(pk) for pk in value}),
+                             int(max_missing))
+
+    def get_max_missing(self, queryset, name, value):
         return queryset
 
+    def get_user_relation(self, queryset, model, value):
+        if not value:
+            return queryset
+        if not self.request.user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            user=self.request.user, recipe=OuterRef('pk')
+        )))
+
+    def get_is_favorited(self, queryset, name, value):
+        return self.get_user_relation(queryset, Favorite, value)
+
     def get_is_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return queryset.filter(users_shopping_list__user=self.request.user)
-        return queryset
+        return self.get_user_relation(queryset, Shopping, value)
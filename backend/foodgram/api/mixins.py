@@ -0,0 +1,96 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from recipes.versions import get_versions
+
+
+def request_versions(request, names):
+    versions = request.__dict__.setdefault('versions', {})
+    names = tuple(names)
+    if names not in versions:
+        versions[names] = get_versions(*names)
+    return versions[names]
+
+
+class ConditionalGetMixin:
+    version_names = ()
+
+    def get_validators(self):
+        names = list(self.version_names)
+        if self.request.user.is_authenticated:
+            names.append(f'user:{self.request.user.pk}')
+        versions = request_versions(self.request, names)
+        return versions, max(versions, default=0) / 10 ** 9
+
+    def conditional(self, handler, request, *args, **kwargs):
+        parts, last_modified = self.get_validators()
+        etag = quote_etag(hashlib.md5(repr(
+            (request.get_full_path(), request.user.pk, *parts)
+        ).encode()).hexdigest())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified)
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class AnonymousCacheMixin:
+    cache_version_names = ()
+    cache_lock_timeout = 10
+
+    def get_cache_key(self, request, versioned=True):
+        query = sorted(
+            (key, sorted(value for value in values if value))
+            for key, values in request.query_params.lists()
+        )
+        parts = (request.path, query)
+        if versioned:
+            parts += (
+                request_versions(request, self.cache_version_names),
+            )
+        return 'response:' + hashlib.md5(repr(parts).encode()).hexdigest()
+
+    def cached(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        stale_key = self.get_cache_key(request, versioned=False)
+        lock = f'{key}:lock'
+        if not cache.add(lock, 1, self.cache_lock_timeout):
+            data = cache.get(stale_key)
+            if data is not None:
+                return Response(data)
+            return handler(request, *args, **kwargs)
+        try:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set_many({key: response.data, stale_key: response.data},
+                               settings.RESPONSE_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
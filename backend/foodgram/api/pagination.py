@@ -1,8 +1,239 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, PageNotAnInteger, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
 
 from foodgram.settings import PAGE_SIZE
+from recipes.models import Recipe
+
+COUNT_STRATEGIES = ('exact', 'cached', 'estimate')
+
+
+def estimate_count(queryset):
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass', [queryset.model._meta.db_table]
+            )
+            count = cursor.fetchone()[0]
+            if count >= 0:
+                return count
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximatePage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = has_next
+
+    def has_next(self):
+        return self.next_exists
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+class CountingPaginator(Paginator):
+
+    def __init__(self, *args, strategy='exact', cache_parts=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if strategy == 'estimate' and connection.vendor != 'postgresql':
+            strategy = 'exact'
+        self.strategy = strategy
+        self.cache_parts = cache_parts
+
+    @cached_property
+    def count(self):
+        if self.strategy == 'estimate':
+            return estimate_count(self.object_list)
+        if self.strategy == 'cached':
+            key = 'count:' + hashlib.md5(repr((
+                str(self.object_list.query), self.cache_parts
+            )).encode()).hexdigest()
+            count = cache.get(key)
+            if count is None:
+                count = super().count
+                cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+            return count
+        return super().count
+
+    def page(self, number):
+        if self.strategy != 'estimate':
+            return super().page(number)
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом')
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return ApproximatePage(object_list[:self.per_page], number, self,
+                               len(object_list) > self.per_page)
+
+
+class KeysetPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering_query_param = 'ordering'
+    has_next = has_previous = False
+
+    @property
+    def max_page_size(self):
+        return settings.PAGINATION_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        orderings = view.cursor_orderings
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering not in orderings:
+            ordering = orderings[0]
+        if ordering.lstrip('-') == 'id':
+            return (ordering,)
+        return (ordering, '-id' if ordering.startswith('-') else 'id')
+
+    def item_position(self, item):
+        return [getattr(item, field.lstrip('-')) for field in self.ordering]
+
+    def encode_position(self, values):
+        return json.dumps([self.ordering[0], *map(str, values)])
+
+    def decode_position(self, position, model):
+        try:
+            ordering, *values = json.loads(position)
+            if (ordering != self.ordering[0]
+                    or len(values) != len(self.ordering)):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def position_filter(self, values, reverse):
+        fields = [field.lstrip('-') for field in self.ordering]
+        lookup = 'lt' if self.ordering[0].startswith('-') != reverse else 'gt'
+        condition = Q(**{f'{fields[-1]}__{lookup}': values[-1]})
+        if len(fields) > 1:
+            condition = Q(**{f'{fields[0]}__{lookup}e': values[0]}) & (
+                Q(**{f'{fields[0]}__{lookup}': values[0]}) | condition
+            )
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        position = cursor and cursor.position
+        reverse = bool(position and cursor.reverse)
+        ordering = self.ordering
+        if position:
+            queryset = queryset.filter(self.position_filter(
+                self.decode_position(position, queryset.model), reverse
+            ))
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(position)
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=self.encode_position(self.item_position(self.page[-1]))
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True,
+            position=self.encode_position(self.item_position(self.page[0]))
+        ))
+
+
+class FeedPagination(KeysetPagination):
+    ordering = ('-id',)
+
+    def paginate_ids(self, fetch, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        before = None
+        if cursor and cursor.position:
+            before, = self.decode_position(cursor.position, Recipe)
+        ids = fetch(before, self.page_size + 1)
+        self.has_next = len(ids) > self.page_size
+        self.page = ids[:self.page_size]
+        return self.page
+
+    def item_position(self, item):
+        return [item]
+
+    def get_previous_link(self):
+        return None
 
 
 class CustomPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    count_query_param = 'count'
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (KeysetPagination.cursor_query_param in request.query_params
+                and getattr(view, 'cursor_orderings', None)):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        strategy = request.query_params.get(self.count_query_param)
+        if strategy not in COUNT_STRATEGIES:
+            strategy = settings.PAGINATION_COUNT_STRATEGY
+        cache_parts = None
+        if strategy == 'cached':
+            if hasattr(view, 'get_validators'):
+                cache_parts = view.get_validators()[0]
+            else:
+                strategy = 'exact'
+        self.django_paginator_class = lambda *args: CountingPaginator(
+            *args, strategy=strategy, cache_parts=cache_parts
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_strategy', self.page.paginator.strategy),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
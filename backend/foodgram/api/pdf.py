@@ -0,0 +1,77 @@
+import atexit
+import io
+import logging
+import multiprocessing
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import exceptions, status
+
+FONT = 'ShoppingListFont'
+FONT_SIZE = 12
+MARGIN = 50
+
+logger = logging.getLogger(__name__)
+
+pool = None
+
+
+class PDFUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Не удалось сформировать PDF, попробуйте позже'
+    default_code = 'pdf_unavailable'
+
+
+def render_pdf(title, lines, font_path):
+    if FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT, font_path))
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    position = height - MARGIN
+    pdf.setFont(FONT, FONT_SIZE + 4)
+    pdf.drawString(MARGIN, position, title)
+    pdf.setFont(FONT, FONT_SIZE)
+    for line in lines:
+        position -= FONT_SIZE * 1.5
+        if position < MARGIN:
+            pdf.showPage()
+            pdf.setFont(FONT, FONT_SIZE)
+            position = height - MARGIN
+        pdf.drawString(MARGIN, position, line)
+    pdf.save()
+    return buffer.getvalue()
+
+
+@atexit.register
+def close_pool():
+    if pool is not None:
+        pool.terminate()
+
+
+def reset_pool(current):
+    global pool
+    if pool is current:
+        pool = None
+    current.terminate()
+
+
+def render_pdf_in_pool(title, lines):
+    global pool
+    if pool is None:
+        pool = multiprocessing.Pool(settings.PDF_WORKERS)
+    current = pool
+    result = current.apply_async(
+        render_pdf, (title, lines, settings.PDF_FONT_PATH)
+    )
+    try:
+        return result.get(timeout=settings.PDF_TIMEOUT)
+    except multiprocessing.TimeoutError:
+        reset_pool(current)
+        raise PDFUnavailable()
+    except Exception:
+        logger.exception('Не удалось сформировать PDF')
+        raise PDFUnavailable()
@@ -1,17 +1,109 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
 from rest_framework import serializers
 
+from api.uploads import is_image_token, make_image_token, read_image_token
+
+from recipes.images import FORMATS, VARIANTS, schedule_variants
 from recipes.models import (Favorite, Ingredient, IngredientinRecipe, Recipe,
                             Shopping, Tag)
+from recipes.search import update_recipe_indexes
+from recipes.shopping import add_to_carts, remove_from_carts
+from recipes.versions import bump_version
 from users.models import Follow, User
 
 
+class ImageVariantsField(serializers.Field):
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, recipe):
+        variants = recipe.image_variants or {
+            variant: dict.fromkeys(FORMATS, recipe.image.name)
+            for variant in VARIANTS
+        }
+        request = self.context.get('request')
+        return {
+            variant: {
+                extension: self.url(name, request)
+                for extension, name in files.items()
+            }
+            for variant, files in variants.items()
+        }
+
+    def url(self, name, request):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+
+class RecipeImageField(Base64ImageField):
+
+    def to_internal_value(self, data):
+        if is_image_token(data):
+            return read_image_token(data, self.context['request'].user)
+        return super().to_internal_value(data)
+
+
+class ImageUploadSerializer(serializers.Serializer):
+    image = serializers.FileField(write_only=True)
+    token = serializers.CharField(read_only=True)
+    url = serializers.CharField(read_only=True)
+
+    def validate_image(self, file):
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                image_format = image.format
+                if max(width, height) > settings.IMAGE_MAX_SIDE:
+                    raise serializers.ValidationError(
+                        'Слишком большое разрешение картинки'
+                    )
+                image.verify()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            raise serializers.ValidationError('Загрузите корректную картинку')
+        if image_format not in ('JPEG', 'PNG', 'GIF', 'WEBP'):
+            raise serializers.ValidationError(
+                'Допустимы картинки JPEG, PNG, GIF и WEBP'
+            )
+        file.seek(0)
+        file.image_format = image_format
+        return file
+
+    def create(self, validated_data):
+        file = validated_data['image']
+        extension = file.image_format.lower().replace('jpeg', 'jpg')
+        name = default_storage.save(
+            os.path.join('image', f'{uuid.uuid4().hex}.{extension}'), file
+        )
+        return {
+            'token': make_image_token(name, self.context['request'].user),
+            'url': self.context['request'].build_absolute_uri(
+                default_storage.url(name)
+            ),
+        }
+
+
+class BatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=settings.BATCH_MAX_SIZE
+    )
+
+
 class RecipeMiniSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = fields
 
 
@@ -54,6 +146,8 @@ class CustomUserSerializer(UserSerializer):
         read_only_fields = fields
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         if user.is_authenticated:
             return Follow.objects.filter(user=user, following=obj).exists()
@@ -67,9 +161,20 @@ class CustomUserSerializer(UserSerializer):
         return user
 
 
+class UserCountsSerializer(CustomUserSerializer):
+    recipes_count = serializers.IntegerField(read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('email', 'id', 'username', 'first_name', 'last_name',
+                  'is_subscribed', 'recipes_count', 'followers_count')
+        read_only_fields = fields
+
+
 class UserSubscription(CustomUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipe.count')
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -79,20 +184,9 @@ class UserSubscription(CustomUserSerializer):
         )
         read_only_fields = fields
 
-    def validate(self, data):
-        author = self.instance
-        user = self.context.get('request').user
-        if Follow.objects.filter(following=author, user=user).exists():
-            raise serializers.ValidationError(
-                'Вы уже подписаны на этого пользователя!'
-            )
-        if user == author:
-            raise serializers.ValidationError(
-                'Вы не можете подписаться на самого себя!'
-            )
-        return data
-
     def get_recipes(self, obj):
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeMiniSerializer(obj.recipes_preview, many=True).data
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
         recipes = obj.recipes.all()
@@ -107,7 +201,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(many=True,
                                              source='ingredients_in_recipe')
-    image = Base64ImageField()
+    image = RecipeImageField()
     cooking_time = serializers.IntegerField()
 
     class Meta:
@@ -159,22 +253,35 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                                    recipe=recipe, amount=data['amount'])
             )
         IngredientinRecipe.objects.bulk_create(ingredient_list)
+        update_recipe_indexes([recipe.id])
+        bump_version('recipes')
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients_in_recipe')
         recipe = super().create(validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(ingredients, recipe)
+        schedule_variants(recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        # FOR UPDATE ждет вставок в списки покупок, держащих FOR KEY SHARE.
+        Recipe.objects.select_for_update().filter(pk=instance.pk).exists()
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients_in_recipe')
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
         recipe = super().update(instance, validated_data)
         recipe.tags.set(tags)
+        remove_from_carts(recipe.id)
         recipe.ingredients.clear()
         self.create_ingredients(ingredients, recipe)
+        add_to_carts(recipe.id)
+        if 'image' in validated_data:
+            schedule_variants(recipe.id)
         return instance
 
 
@@ -183,30 +290,22 @@ class ReadRecipeSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(many=True,
                                              source='ingredients_in_recipe')
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+    is_favorited = serializers.BooleanField(read_only=True)
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+            'is_in_shopping_cart', 'name', 'image', 'image_variants', 'text',
+            'cooking_time'
         )
 
-    def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return Favorite.objects.filter(
-                user=user, recipe=obj).exists()
-        return False
-
-    def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return Shopping.objects.filter(
-                user=user, recipe=obj).exists()
-        return False
+    def to_representation(self, instance):
+        instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
 
 
 class ShoppingSerializer(serializers.ModelSerializer):
@@ -0,0 +1,202 @@
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+
+from api.filters import get_tag_ids
+from recipes.counters import COUNTERS, recount
+from recipes.models import (Favorite, Ingredient, IngredientinRecipe, Recipe,
+                            Shopping, Tag)
+from recipes.search import update_recipe_indexes
+from recipes.shopping import expected_totals, rebuild_carts
+from users.models import Follow, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNo'
+    'AAAAggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+PAGE_SIZES = (1, 5, 20)
+
+# Максимальное число SQL-запросов на один вызов маршрута.
+BUDGETS = {
+    'tags-list': 2,
+    'tags-detail': 2,
+    'ingredients-list': 2,
+    'ingredients-detail': 2,
+    'ingredients-autocomplete': 2,
+    'users-list': 3,
+    'users-detail': 2,
+    'users-me': 2,
+    'users-subscriptions': 4,
+    'users-subscribe': 5,
+    'users-subscribe-batch': 4,
+    'recipes-list': 6,
+    'recipes-detail': 5,
+    'recipes-create': 35,
+    'recipes-update': 42,
+    'recipes-feed': 4,
+    'recipes-upload-image': 0,
+    'recipes-favorite': 4,
+    'recipes-favorite-batch': 4,
+    'recipes-shopping-cart': 5,
+    'recipes-shopping-cart-batch': 5,
+    'recipes-download-shopping-cart': 1,
+    'token-login': 6,
+    'recipes-list-not-modified': 1,
+    'recipes-detail-not-modified': 2,
+    'tags-list-not-modified': 1,
+    'users-list-not-modified': 1,
+    'users-subscriptions-not-modified': 1,
+    'catalog': 3,
+    'admin-changelist': 6,
+}
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class FoodgramTestCase(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = defaultdict(list)
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(email=f'user{i}@foodgram.ru', username=f'user{i}',
+                 first_name='Имя', last_name='Фамилия')
+            for i in range(25)
+        )
+        cls.users = list(User.objects.order_by('id'))
+        cls.user = cls.users[0]
+        cls.user.set_password('password')
+        cls.user.save()
+        Tag.objects.bulk_create(
+            Tag(name=f'Тэг {i}', color=f'#00000{i}', slug=f'tag{i}')
+            for i in range(3)
+        )
+        cls.tags = list(Tag.objects.order_by('id'))
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(30)
+        )
+        cls.ingredients = list(Ingredient.objects.order_by('id'))
+        Recipe.objects.bulk_create(
+            Recipe(name=f'Рецепт {i}', author=cls.users[i % 24 + 1],
+                   text='Описание', cooking_time=10, image='image/test.png')
+            for i in range(48)
+        )
+        cls.recipes = list(Recipe.objects.order_by('id'))
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe in cls.recipes for tag in cls.tags
+        )
+        IngredientinRecipe.objects.bulk_create(
+            IngredientinRecipe(recipe=recipe, amount=i + 1,
+                               ingredient=cls.ingredients[(j + i) % 30])
+            for j, recipe in enumerate(cls.recipes) for i in range(5)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, following=author)
+            for author in cls.users[1:]
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[::2]
+        )
+        Shopping.objects.bulk_create(
+            Shopping(user=cls.user, recipe=recipe) for recipe in cls.recipes
+        )
+        rebuild_carts([cls.user.id], expected_totals([cls.user.id]))
+        for model, field in COUNTERS:
+            recount(model, field)
+        update_recipe_indexes([recipe.id for recipe in cls.recipes])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        if not cls.report:
+            return
+        sys.stderr.write(f'\n{cls.__name__}: route / queries / sql ms\n')
+        for route, calls in sorted(cls.report.items()):
+            queries = max(count for count, _ in calls)
+            sql_time = max(time for _, time in calls)
+            sys.stderr.write(f'{route:36} {queries:4} {sql_time:8.2f}\n')
+
+    def setUp(self):
+        cache.clear()
+        get_tag_ids()
+        self.anon = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def measure(self, route, method, url, data=None, client=None,
+                status=200, format='json', **headers):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data, format=format,
+                                               **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status,
+                         getattr(response, 'data', None))
+        count = len(context.captured_queries)
+        sql_time = sum(
+            float(query['time']) for query in context.captured_queries
+        ) * 1000
+        self.report[route].append((count, sql_time))
+        self.assertLessEqual(
+            count, BUDGETS[route],
+            f'{route}: {count} запросов при бюджете {BUDGETS[route]}'
+        )
+        self.response = response
+        self.queries = context.captured_queries
+        return count
+
+    def assertFlat(self, route, url, client=None):
+        separator = '&' if '?' in url else '?'
+        counts = {
+            size: self.measure(route, 'get', f'{url}{separator}limit={size}',
+                               client=client)
+            for size in PAGE_SIZES
+        }
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{route}: число запросов растет с размером страницы {counts}'
+        )
+
+    def walk_cursor(self, route, url, link='next'):
+        counts, ids = set(), []
+        while url:
+            counts.add(self.measure(route, 'get', url))
+            ids.extend(item['id'] for item in self.response.data['results'])
+            self.assertNotIn('count', self.response.data)
+            for query in self.queries:
+                self.assertNotIn('OFFSET', query['sql'])
+            url = self.response.data[link]
+        self.assertEqual(len(counts), 1,
+                         f'{route}: число запросов растет с глубиной {counts}')
+        return ids
+
+    def recipe_data(self):
+        return {
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients[:10]
+            ],
+            'name': 'Новый рецепт',
+            'image': IMAGE,
+            'text': 'Описание',
+            'cooking_time': 5,
+        }
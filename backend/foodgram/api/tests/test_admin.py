@@ -0,0 +1,32 @@
+from rest_framework.test import APIClient
+
+from api.tests.base import FoodgramTestCase
+from users.models import User
+
+
+class AdminChangelistTest(FoodgramTestCase):
+
+    def test_admin_changelists(self):
+        admin = User.objects.create_superuser(
+            email='admin@foodgram.ru', username='admin', password='admin',
+            first_name='Админ', last_name='Админ'
+        )
+        client = APIClient()
+        client.force_login(admin)
+        recipe, user = self.recipes[0], self.user
+        for url in (
+            '/admin/recipes/recipe/',
+            f'/admin/recipes/recipe/?author__pk__exact={recipe.author_id}',
+            '/admin/recipes/ingredient/',
+            '/admin/recipes/ingredientinrecipe/',
+            '/admin/recipes/ingredientinrecipe/?recipe__pk__exact='
+            f'{recipe.id}',
+            '/admin/recipes/favorite/',
+            f'/admin/recipes/shopping/?user__pk__exact={user.id}',
+            '/admin/users/user/',
+            f'/admin/users/follow/?user__pk__exact={user.id}',
+        ):
+            self.measure('admin-changelist', 'get', url, client=client,
+                         format=None)
+            if '__pk__exact' in url:
+                self.assertContains(self.response, 'selected>')
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+from recipes.versions import bump_version
+
+
+class ResponseCacheTest(FoodgramTestCase):
+
+    def test_busy_key_serves_stale_response(self):
+        url = '/api/recipes/?limit=3'
+        self.measure('recipes-list', 'get', url, client=self.anon)
+        stale = self.response.data
+        Recipe.objects.filter(id=self.recipes[-1].id).update(name='Новое')
+        bump_version('recipes')
+        with mock.patch.object(cache, 'add', return_value=False):
+            self.measure('recipes-list-not-modified', 'get', url,
+                         client=self.anon)
+            self.assertEqual(self.response.data, stale)
+            cache.clear()
+            self.measure('recipes-list', 'get', url, client=self.anon)
+            self.assertEqual(self.response.data['results'][0]['name'],
+                             'Новое')
+        self.measure('recipes-list', 'get', url, client=self.anon)
+        self.measure('recipes-list-not-modified', 'get', url,
+                     client=self.anon)
+        self.assertEqual(self.response.data['results'][0]['name'], 'Новое')
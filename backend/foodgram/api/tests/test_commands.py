@@ -0,0 +1,38 @@
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+
+class CommandTest(TestCase):
+
+    def test_add_ingredients_rejects_short_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write('соль,г\n\nперец\n')
+            file.flush()
+            with self.assertRaisesMessage(CommandError, 'Строка 3'):
+                call_command('add_ingredients', file.name, stdout=None)
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_seed_foodgram(self):
+        call_command('seed_foodgram', users=5, recipes=20, ingredients=10,
+                     favorites=30, carts=10, follows=8, batch_size=7,
+                     stdout=StringIO())
+        self.assertEqual(User.objects.count(), 5)
+        self.assertTrue(Recipe.objects.exists())
+        for recipe in Recipe.objects.all():
+            self.assertEqual(recipe.image_variants, {})
+            self.assertEqual(
+                (recipe.favorites_count, recipe.in_carts_count),
+                (recipe.users_favorite.count(),
+                 recipe.users_shopping_list.count())
+            )
+        for user in User.objects.all():
+            self.assertEqual(
+                (user.recipes_count, user.followers_count),
+                (user.recipes.count(), user.following.count())
+            )
@@ -0,0 +1,89 @@
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import CounterDelta, Favorite
+
+
+class CounterTest(FoodgramTestCase):
+
+    def test_counters_follow_changes(self):
+        recipe, author = self.recipes[1], self.recipes[1].author
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/recipes/{recipe.id}/favorite/')
+            self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+            self.client.delete(f'/api/recipes/{recipe.id}/shopping_cart/')
+        recipe.refresh_from_db()
+        self.assertEqual(
+            (recipe.favorites_count, recipe.in_carts_count),
+            (recipe.users_favorite.count(), recipe.users_shopping_list.count())
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/users/{author.id}/subscribe/')
+            self.client.force_authenticate(author)
+            self.client.delete(f'/api/recipes/{recipe.id}/')
+        author.refresh_from_db()
+        self.assertEqual(
+            (author.recipes_count, author.followers_count),
+            (author.recipes.count(), author.following.count())
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.users[2],
+                                    recipe=self.recipes[4])
+        self.measure('recipes-list', 'get',
+                     '/api/recipes/?ordering=-favorites_count')
+        self.assertEqual(self.response.data['results'][0]['id'],
+                         self.recipes[4].id)
+
+    def test_rolled_back_changes_are_not_counted(self):
+        recipe = self.recipes[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Favorite.objects.create(user=self.users[3], recipe=recipe)
+                try:
+                    with transaction.atomic():
+                        Favorite.objects.create(user=self.users[4],
+                                                recipe=recipe)
+                        raise ValueError
+                except ValueError:
+                    pass
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.users_favorite.count(), 1)
+
+    def test_popular_list_follows_favorites(self):
+        url = '/api/recipes/?ordering=-favorites_count'
+        self.measure('recipes-list', 'get', url, client=self.anon)
+        etag = self.response['ETag']
+        self.measure('recipes-list', 'get', '/api/recipes/', client=self.anon)
+        list_etag = self.response['ETag']
+        recipe = self.recipes[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+            self.client.force_authenticate(self.users[2])
+            self.client.post(f'/api/recipes/{recipe.id}/favorite/')
+        self.measure('recipes-list-not-modified', 'get', '/api/recipes/',
+                     client=self.anon, status=304,
+                     HTTP_IF_NONE_MATCH=list_etag)
+        self.measure('recipes-list', 'get', url, client=self.anon,
+                     HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(self.response.data['results'][0]['id'], recipe.id)
+        modified = recipe.modified
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.modified, modified)
+
+    def test_deltas_are_folded_once(self):
+        recipe = self.recipes[1]
+        with self.captureOnCommitCallbacks() as callbacks:
+            for user in self.users[3:6]:
+                Favorite.objects.create(user=user, recipe=recipe)
+        self.assertEqual(CounterDelta.objects.count(), 3)
+        with CaptureQueriesContext(connection) as context:
+            for callback in callbacks:
+                callback()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 3)
+        self.assertFalse(CounterDelta.objects.exists())
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
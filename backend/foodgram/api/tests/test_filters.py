@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.test import RequestFactory
+
+from api.filters import RecipeFilter
+from api.tests.base import FoodgramTestCase
+from recipes.models import (Favorite, IngredientinRecipe, Recipe, Shopping,
+                            Tag)
+
+
+class RecipeFilterTest(FoodgramTestCase):
+
+    def test_ingredient_filters(self):
+        contents = defaultdict(set)
+        for recipe, ingredient in IngredientinRecipe.objects.values_list(
+            'recipe', 'ingredient'
+        ):
+            contents[recipe].add(ingredient)
+        ids = [ingredient.id for ingredient in self.ingredients]
+        wanted, unwanted, have = {ids[3], ids[5]}, {ids[7]}, set(ids[:8])
+        cases = (
+            ({'ingredients': f'{ids[3]},{ids[5]}'},
+             lambda used: wanted <= used),
+            ({'exclude_ingredients': str(ids[7])},
+             lambda used: not used & unwanted),
+            ({'have': ','.join(map(str, have))},
+             lambda used: used <= have),
+            ({'have': ','.join(map(str, have)), 'max_missing': '2'},
+             lambda used: used & have and len(used - have) <= 2),
+        )
+        for params, expected in cases:
+            with self.subTest(**params):
+                queryset = RecipeFilter(params, Recipe.objects.all()).qs
+                self.assertEqual(
+                    {recipe.id for recipe in queryset},
+                    {recipe for recipe, used in contents.items()
+                     if expected(used)}
+                )
+        missing = [
+            len(contents[recipe.id] - have) for recipe in RecipeFilter(
+                {'have': ','.join(map(str, have)), 'max_missing': '3'},
+                Recipe.objects.all()
+            ).qs
+        ]
+        self.assertEqual(missing, sorted(missing))
+
+    def test_unknown_tag_reloads_tag_map(self):
+        Tag.objects.bulk_create([Tag(name='Новый', color='#123456',
+                                     slug='new')])
+        tag = Tag.objects.get(slug='new')
+        Recipe.tags.through.objects.create(recipe=self.recipes[0], tag=tag)
+        response = self.client.get('/api/recipes/?tags=new')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[0].id]
+        )
+        response = self.client.get('/api/recipes/?tags=missing')
+        self.assertEqual(response.status_code, 400)
+
+    def test_recipe_filter_plan(self):
+        request = RequestFactory().get('/api/recipes/')
+        request.user = self.user
+        queryset = RecipeFilter(
+            {'tags': ['tag0', 'tag1'], 'is_favorited': '1',
+             'is_in_shopping_cart': '1'},
+            Recipe.objects.all(), request=request
+        ).qs
+        sql = str(queryset.query).upper()
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN', sql)
+        self.assertEqual(len(queryset), len(self.recipes[::2]))
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertIn('Semi Join', plan)
+            self.assertNotIn('HashAggregate', plan)
+            self.assertNotIn('Unique', plan)
+            return
+        for model in (Recipe.tags.through, Favorite, Shopping):
+            self.assertRegex(plan, r'SEARCH \w+ USING (COVERING )?INDEX '
+                                   rf'\w*{model._meta.db_table}')
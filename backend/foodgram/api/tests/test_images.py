@@ -0,0 +1,88 @@
+import base64
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import IMAGE, FoodgramTestCase
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class ImageTest(FoodgramTestCase):
+
+    def test_image_variants(self):
+        self.client.post('/api/recipes/', self.recipe_data(), format='json')
+        recipe = Recipe.objects.filter(author=self.user).first()
+        self.client.force_authenticate(self.users[1])
+        self.client.post(f'/api/users/{self.user.id}/subscribe/')
+        url = '/api/users/subscriptions/'
+        self.measure('users-subscriptions', 'get', url)
+        etag = self.response['ETag']
+        build_variants(recipe.id)
+        self.measure('users-subscriptions', 'get', url,
+                     HTTP_IF_NONE_MATCH=etag)
+        self.assertIn('/image/variants/', self.response.data['results'][0][
+            'recipes'
+        ][0]['image_variants']['thumbnail']['webp'])
+        self.measure('recipes-detail', 'get', f'/api/recipes/{recipe.id}/')
+        variants = self.response.data['image_variants']
+        self.assertEqual(set(variants), {'thumbnail', 'medium'})
+        self.assertIn('/image/variants/', variants['thumbnail']['webp'])
+        self.assertTrue(variants['thumbnail']['webp'].endswith('.webp'))
+
+    @override_settings(MEDIA_GRACE_PERIOD=0)
+    def test_shared_image_is_deleted_with_last_recipe(self):
+        for _ in range(2):
+            self.client.post('/api/recipes/', self.recipe_data(),
+                             format='json')
+        first, second = Recipe.objects.filter(author=self.user)
+        self.assertEqual(first.image.name, second.image.name)
+        for recipe, exists in ((first, True), (second, False)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f'/api/recipes/{recipe.id}/')
+            self.assertEqual(default_storage.exists(recipe.image.name),
+                             exists)
+
+    def test_upload_image(self):
+        image = SimpleUploadedFile(
+            'photo.png', base64.b64decode(IMAGE.split(',')[1]), 'image/png'
+        )
+        self.measure('recipes-upload-image', 'post', '/api/recipes/images/',
+                     status=201, data={'image': image},
+                     format='multipart')
+        data = self.recipe_data()
+        data['image'] = self.response.data['token']
+        self.measure('recipes-create', 'post', '/api/recipes/', data,
+                     status=201)
+        self.assertTrue(self.response.data['image'].endswith('.png'))
+        self.client.force_authenticate(self.users[1])
+        self.measure('recipes-create', 'post', '/api/recipes/', data,
+                     status=400)
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=10)
+    def test_upload_image_too_large(self):
+        image = SimpleUploadedFile('photo.png', b'0' * 100, 'image/png')
+        self.measure('recipes-upload-image', 'post', '/api/recipes/images/',
+                     status=413, data={'image': image}, format='multipart')
+
+    def test_clean_media_reads_references_once(self):
+        self.client.post('/api/recipes/', self.recipe_data(), format='json')
+        recipe = Recipe.objects.filter(author=self.user).first()
+        orphans = [
+            default_storage.save(f'image/orphan{i}.png',
+                                 ContentFile(str(i).encode()))
+            for i in range(3)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            call_command('clean_media', grace_period=0, batch_size=1,
+                         stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(len(context.captured_queries), 1 + len(orphans))
+        self.assertTrue(default_storage.exists(recipe.image.name))
+        for name in orphans:
+            self.assertFalse(default_storage.exists(name))
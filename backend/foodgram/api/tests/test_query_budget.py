@@ -0,0 +1,212 @@
+from django.test import override_settings
+
+from api import pdf
+from api.tests.base import BUDGETS, FoodgramTestCase
+from api.urls import v1_router
+from recipes.models import Favorite, Recipe
+from users.models import Follow
+
+# Маршруты djoser для управления аккаунтом, не относящиеся к данным сервиса.
+IGNORED_ROUTES = {
+    'api-root', 'users-activation', 'users-resend-activation',
+    'users-reset-password', 'users-reset-password-confirm',
+    'users-reset-username', 'users-reset-username-confirm',
+    'users-set-password', 'users-set-username',
+}
+
+
+class QueryBudgetTest(FoodgramTestCase):
+
+    def test_every_route_has_budget(self):
+        routes = {url.name for url in v1_router.urls} - IGNORED_ROUTES
+        self.assertFalse(
+            {route for route in routes
+             if not any(name.startswith(route) for name in BUDGETS)},
+            'Для маршрута не задан бюджет запросов'
+        )
+
+    def test_tags(self):
+        self.measure('tags-list', 'get', '/api/tags/')
+        self.measure('tags-detail', 'get', f'/api/tags/{self.tags[0].id}/')
+
+    def test_ingredients(self):
+        self.measure('ingredients-list', 'get', '/api/ingredients/')
+        self.measure('ingredients-list', 'get',
+                     '/api/ingredients/?name=Ингр')
+        self.measure('ingredients-detail', 'get',
+                     f'/api/ingredients/{self.ingredients[0].id}/')
+        self.measure('ingredients-autocomplete', 'get',
+                     '/api/ingredients/autocomplete/?name=ингр&limit=5')
+        self.measure('ingredients-autocomplete', 'get',
+                     '/api/ingredients/autocomplete/?name=диент&limit=5')
+
+    def test_catalog(self):
+        self.measure('catalog', 'get', '/api/catalog/', client=self.anon)
+
+    def test_users(self):
+        self.assertFlat('users-list', '/api/users/')
+        self.assertFlat('users-list', '/api/users/', client=self.anon)
+        self.measure('users-detail', 'get', f'/api/users/{self.users[1].id}/')
+        self.measure('users-me', 'get', '/api/users/me/')
+
+    def test_subscriptions(self):
+        self.assertFlat('users-subscriptions', '/api/users/subscriptions/')
+        self.assertFlat('users-subscriptions',
+                        '/api/users/subscriptions/?recipes_limit=1')
+        self.assertFlat('users-subscriptions',
+                        '/api/users/subscriptions/?recipes_limit=3')
+
+    def test_count_strategies(self):
+        url = '/api/recipes/?tags=tag0&limit=5&count='
+        exact = self.measure('recipes-list', 'get', url + 'exact')
+        self.assertEqual(self.response.data['count'], len(self.recipes))
+        self.assertEqual(self.response.data['count_strategy'], 'exact')
+        self.measure('recipes-list', 'get', url + 'cached')
+        cached = self.measure('recipes-list', 'get', url + 'cached&page=2')
+        self.assertEqual(self.response.data['count'], len(self.recipes))
+        self.assertEqual(self.response.data['count_strategy'], 'cached')
+        self.assertEqual(cached, exact - 1)
+        self.measure('recipes-list', 'get', url + 'estimate')
+        self.assertIn(self.response.data['count_strategy'],
+                      ('estimate', 'exact'))
+
+    def test_keyset_pagination(self):
+        self.assertEqual(
+            self.walk_cursor('recipes-list', '/api/recipes/?cursor=&limit=5'),
+            [recipe.id for recipe in reversed(self.recipes)]
+        )
+        self.assertEqual(
+            self.walk_cursor(
+                'recipes-list',
+                '/api/recipes/?cursor=&limit=7&ordering=-modified'
+            ),
+            [recipe.id for recipe in reversed(self.recipes)]
+        )
+        Recipe.objects.update(modified=self.recipes[0].modified)
+        ids = self.walk_cursor(
+            'recipes-list', '/api/recipes/?cursor=&limit=5&ordering=-modified'
+        )
+        self.assertEqual(ids, [recipe.id for recipe in reversed(self.recipes)])
+        self.assertEqual(
+            self.walk_cursor('recipes-list', self.response.data['previous'],
+                             link='previous'),
+            [pk for start in range(40, -1, -5) for pk in ids[start:start + 5]]
+        )
+        self.assertEqual(
+            self.walk_cursor(
+                'recipes-list',
+                '/api/recipes/?cursor=&limit=4&ordering=-favorites_count'
+            ),
+            list(Recipe.objects.order_by(
+                '-favorites_count', '-id'
+            ).values_list('id', flat=True))
+        )
+        self.assertEqual(
+            self.walk_cursor('users-subscriptions',
+                             '/api/users/subscriptions/?cursor=&limit=5'),
+            [user.id for user in self.users[1:]]
+        )
+
+    def test_feed(self):
+        Follow.objects.filter(
+            user=self.user, following__in=self.users[13:]
+        ).delete()
+        Favorite.objects.create(user=self.user, recipe=self.recipes[1])
+        ids = self.walk_cursor('recipes-feed',
+                               '/api/recipes/feed/?limit=5')
+        self.assertEqual(ids, [
+            recipe.id for recipe in reversed(self.recipes)
+            if recipe.author in self.users[1:13]
+        ])
+        self.measure('recipes-feed', 'get', '/api/recipes/feed/?limit=50')
+        flags = {
+            recipe['id']: (recipe['is_favorited'],
+                           recipe['author']['is_subscribed'])
+            for recipe in self.response.data['results']
+        }
+        self.assertEqual(flags[self.recipes[1].id], (True, True))
+        self.measure('recipes-feed', 'get', '/api/recipes/feed/',
+                     client=self.anon, status=401)
+        with override_settings(PAGINATION_MAX_PAGE_SIZE=3):
+            self.measure('recipes-feed', 'get',
+                         '/api/recipes/feed/?limit=1000')
+        self.assertEqual(len(self.response.data['results']), 3)
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.users[1].id}/subscribe/'
+        self.measure('users-subscribe', 'delete', url, status=204)
+        self.measure('users-subscribe', 'delete', url, status=404)
+        self.measure('users-subscribe', 'post', url, status=201)
+        self.assertTrue(self.response.data['is_subscribed'])
+        self.measure('users-subscribe', 'post', url, status=400)
+        self.measure('users-subscribe', 'post',
+                     f'/api/users/{self.user.id}/subscribe/', status=400)
+        self.measure('users-subscribe', 'post',
+                     f'/api/users/{self.users[-1].id + 1}/subscribe/',
+                     status=404)
+
+    def test_recipes_read(self):
+        self.assertFlat('recipes-list', '/api/recipes/')
+        self.assertFlat('recipes-list', '/api/recipes/', client=self.anon)
+        self.assertFlat('recipes-list',
+                        '/api/recipes/?tags=tag0&tags=tag1&is_favorited=1')
+        self.assertFlat('recipes-list', '/api/recipes/?is_in_shopping_cart=1')
+        self.measure('recipes-detail', 'get',
+                     f'/api/recipes/{self.recipes[0].id}/')
+
+    def test_not_modified(self):
+        for route, url in (
+            ('recipes-list', '/api/recipes/?tags=tag0&is_favorited=1'),
+            ('recipes-detail', f'/api/recipes/{self.recipes[0].id}/'),
+            ('tags-list', '/api/tags/'),
+            ('users-list', '/api/users/'),
+            ('users-subscriptions', '/api/users/subscriptions/'),
+        ):
+            self.measure(route, 'get', url)
+            self.measure(f'{route}-not-modified', 'get', url, status=304,
+                         HTTP_IF_NONE_MATCH=self.response['ETag'])
+
+    def test_recipes_write(self):
+        self.measure('recipes-create', 'post', '/api/recipes/',
+                     self.recipe_data(), status=201)
+        recipe = Recipe.objects.filter(author=self.user).first()
+        self.measure('recipes-update', 'patch', f'/api/recipes/{recipe.id}/',
+                     self.recipe_data())
+        bumps = [query for query in self.queries
+                 if query['sql'].startswith('INSERT INTO "recipes_version"')]
+        self.assertLessEqual(len(bumps), 2)
+
+    def test_favorite_and_shopping_cart(self):
+        recipe = self.recipes[1]
+        for route, path in (('recipes-favorite', 'favorite'),
+                            ('recipes-shopping-cart', 'shopping_cart')):
+            url = f'/api/recipes/{recipe.id}/{path}/'
+            self.client.delete(url)
+            self.measure(route, 'post', url, status=201)
+            self.measure(route, 'post', url, status=400)
+            self.measure(route, 'delete', url, status=204)
+            self.measure(route, 'delete', url, status=400)
+            missing = f'/api/recipes/{self.recipes[-1].id + 1}/{path}/'
+            self.measure(route, 'post', missing, status=404)
+
+    def test_download_shopping_cart(self):
+        for file_format in ('txt', 'csv', 'json', 'pdf'):
+            self.measure(
+                'recipes-download-shopping-cart', 'get',
+                f'/api/recipes/download_shopping_cart/?format={file_format}'
+            )
+        url = '/api/recipes/download_shopping_cart/?format=pdf'
+        with override_settings(PDF_TIMEOUT=0):
+            self.measure('recipes-download-shopping-cart', 'get', url,
+                         status=503)
+        self.assertIsNone(pdf.pool)
+        with override_settings(PDF_FONT_PATH='/nonexistent.ttf'):
+            with self.assertLogs('api.pdf', 'ERROR'):
+                self.measure('recipes-download-shopping-cart', 'get', url,
+                             status=503)
+        self.measure('recipes-download-shopping-cart', 'get', url)
+
+    def test_token_login(self):
+        self.measure('token-login', 'post', '/api/auth/token/login/',
+                     {'email': self.user.email, 'password': 'password'},
+                     client=self.anon)
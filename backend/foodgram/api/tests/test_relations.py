@@ -0,0 +1,83 @@
+from api.tests.base import FoodgramTestCase
+from recipes.models import Shopping
+from recipes.shopping import expected_totals, stored_totals
+from users.models import Follow
+
+
+class BatchRelationTest(FoodgramTestCase):
+
+    def test_batch_relations(self):
+        missing = self.recipes[-1].id + 1
+        url = '/api/recipes/shopping_cart/'
+        counts = set()
+        for recipes in (self.recipes[:2], self.recipes[2:12]):
+            ids = [recipe.id for recipe in recipes]
+            with self.captureOnCommitCallbacks(execute=True):
+                counts.add(self.measure('recipes-shopping-cart-batch',
+                                        'delete', url, {'ids': ids}))
+            with self.captureOnCommitCallbacks(execute=True):
+                counts.add(self.measure('recipes-shopping-cart-batch',
+                                        'post', url,
+                                        {'ids': [*ids[1:], missing]}))
+            self.assertEqual(self.response.data['results'], [
+                *({'id': pk, 'status': 201} for pk in ids[1:]),
+                {'id': missing, 'status': 404},
+            ])
+        self.assertEqual(len(counts), 1, counts)
+        self.assertEqual(expected_totals([self.user.id]),
+                         stored_totals([self.user.id]))
+        self.recipes[3].refresh_from_db()
+        self.assertEqual(self.recipes[3].in_carts_count, 1)
+        self.measure('recipes-favorite-batch', 'post',
+                     '/api/recipes/favorite/',
+                     {'ids': [self.recipes[0].id, self.recipes[1].id]})
+        self.assertEqual(
+            [item['status'] for item in self.response.data['results']],
+            [400, 201]
+        )
+        authors = [self.user.id, self.users[1].id, self.users[2].id]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.measure('users-subscribe-batch', 'delete',
+                         '/api/users/subscribe/', {'ids': authors[1:]})
+            self.measure('users-subscribe-batch', 'post',
+                         '/api/users/subscribe/', {'ids': authors})
+        self.assertEqual(
+            [item['status'] for item in self.response.data['results']],
+            [400, 201, 201]
+        )
+        self.users[1].refresh_from_db()
+        self.assertEqual(self.users[1].followers_count, 1)
+        self.measure('users-subscribe-batch', 'post', '/api/users/subscribe/',
+                     {'ids': list(range(1, 200))}, status=400)
+
+    def test_relation_writes_bump_only_user_stamps(self):
+        self.measure('users-list', 'get', '/api/users/', client=self.anon)
+        etag = self.response['ETag']
+        author = self.users[1]
+        url = f'/api/users/{author.id}/subscribe/'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.measure('users-subscribe', 'delete', url, status=204)
+        bumps = [query['sql'] for query in self.queries
+                 if 'recipes_version' in query['sql']
+                 and query['sql'].startswith('INSERT')]
+        self.assertEqual(len(bumps), 1)
+        self.assertIn(f'user:{self.user.id}', bumps[0])
+        self.assertNotIn("'users'", bumps[0])
+        for callback in callbacks:
+            callback()
+        self.measure('users-list', 'get', '/api/users/', client=self.anon,
+                     HTTP_IF_NONE_MATCH=etag)
+
+    def test_user_relations_keep_anonymous_validators(self):
+        etags = {}
+        for route, url in (('recipes-list', '/api/recipes/'),
+                           ('users-list', '/api/users/')):
+            self.measure(route, 'get', url, client=self.anon)
+            etags[route, url] = self.response['ETag']
+        Follow.objects.filter(user=self.users[2]).delete()
+        Follow.objects.create(user=self.users[2], following=self.users[3])
+        Shopping.objects.create(user=self.users[2], recipe=self.recipes[1])
+        for (route, url), etag in etags.items():
+            self.measure(f'{route}-not-modified', 'get', url,
+                         client=self.anon, status=304,
+                         HTTP_IF_NONE_MATCH=etag)
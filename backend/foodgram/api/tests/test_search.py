@@ -0,0 +1,17 @@
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+from recipes.search import update_recipe_indexes
+
+
+class SearchTest(FoodgramTestCase):
+
+    def test_search(self):
+        dish, mention = self.recipes[10], self.recipes[20]
+        Recipe.objects.filter(id=dish.id).update(name='Борщ украинский')
+        Recipe.objects.filter(id=mention.id).update(text='Подавать как Борщ')
+        update_recipe_indexes([dish.id, mention.id])
+        self.measure('recipes-list', 'get', '/api/recipes/?search=Борщ')
+        self.assertEqual(
+            [recipe['id'] for recipe in self.response.data['results']],
+            [dish.id, mention.id]
+        )
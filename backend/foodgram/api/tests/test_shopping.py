@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.db import DatabaseError
+
+from api.tests.base import FoodgramTestCase
+from recipes.shopping import expected_totals, stored_totals
+
+
+class ShoppingTotalsTest(FoodgramTestCase):
+
+    def test_shopping_totals_follow_changes(self):
+        recipe = self.recipes[1]
+        url = f'/api/recipes/{recipe.id}/shopping_cart/'
+        self.client.delete(url)
+        self.client.post(url)
+        data = self.recipe_data()
+        data['ingredients'] = [
+            {'id': ingredient.id, 'amount': 7}
+            for ingredient in self.ingredients[5:15]
+        ]
+        self.client.force_authenticate(recipe.author)
+        self.client.patch(f'/api/recipes/{recipe.id}/', data, format='json')
+        self.assertEqual(expected_totals([self.user.id]),
+                         stored_totals([self.user.id]))
+        self.client.delete(f'/api/recipes/{recipe.id}/')
+        self.assertEqual(expected_totals([self.user.id]),
+                         stored_totals([self.user.id]))
+
+    def test_failed_update_keeps_totals(self):
+        recipe = self.recipes[1]
+        users = [user.id for user in self.users]
+        before = stored_totals(users)
+        self.client.force_authenticate(recipe.author)
+        with mock.patch('api.serializers.add_to_carts',
+                        side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.patch(f'/api/recipes/{recipe.id}/',
+                                  self.recipe_data(), format='json')
+        self.assertEqual(stored_totals(users), before)
+        self.assertEqual(expected_totals(users), before)
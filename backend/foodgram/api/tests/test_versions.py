@@ -0,0 +1,17 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.catalog import get_catalog
+from recipes.models import Tag
+
+
+class VersionTest(TestCase):
+
+    def test_catalog_sees_changes_from_other_processes(self):
+        version, _, _ = get_catalog()
+        call_command('add_tags', stdout=StringIO())
+        new_version, content, _ = get_catalog()
+        self.assertNotEqual(new_version, version)
+        self.assertIn(Tag.objects.first().slug.encode(), content)
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework import exceptions, serializers, status
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+IMAGE_TOKEN_SALT = 'recipes.image'
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ImageTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Размер картинки превышает допустимый'
+    default_code = 'image_too_large'
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise ImageTooLarge()
+        return super().receive_data_chunk(raw_data, start)
+
+
+class ImageUploadParser(MultiPartParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        meta = request.META.copy()
+        size = int(meta.get('CONTENT_LENGTH') or 0)
+        if size > settings.IMAGE_UPLOAD_MAX_SIZE + MULTIPART_OVERHEAD:
+            raise ImageTooLarge()
+        meta['CONTENT_TYPE'] = media_type
+        parser = DjangoParser(meta, stream, [LimitedUploadHandler(request)],
+                              parser_context.get('encoding', 'utf-8'))
+        try:
+            data, files = parser.parse()
+        except MultiPartParserError as error:
+            raise exceptions.ParseError(
+                f'Multipart form parse error - {error}'
+            )
+        return DataAndFiles(data, files)
+
+
+def make_image_token(name, user):
+    return signing.dumps({'name': name, 'user': user.id},
+                         salt=IMAGE_TOKEN_SALT)
+
+
+def is_image_token(value):
+    return isinstance(value, str) and ':' in value and ';base64,' not in value
+
+
+def read_image_token(token, user):
+    try:
+        payload = signing.loads(token, salt=IMAGE_TOKEN_SALT,
+                                max_age=settings.IMAGE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise serializers.ValidationError(
+            'Токен картинки недействителен или устарел'
+        )
+    if payload['user'] != user.id:
+        raise serializers.ValidationError(
+            'Картинка загружена другим пользователем'
+        )
+    return payload['name']
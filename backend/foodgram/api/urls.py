@@ -1,8 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                    TagViewSet)
+from .views import (CatalogView, CustomUserViewSet, IngredientViewSet,
+                    RecipeViewSet, TagViewSet)
 
 app_name = 'api'
 
@@ -14,6 +14,9 @@ v1_router.register('recipes', RecipeViewSet, basename='recipes')
 
 
 urlpatterns = [
+    path('catalog/', CatalogView.as_view(), name='catalog'),
+    path('catalog/<str:version>/', CatalogView.as_view(),
+         name='catalog-version'),
     path('', include(v1_router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -1,37 +1,145 @@
+import csv
+import json
+
+from django.db import connection
 from django.shortcuts import get_object_or_404
-from django.http.response import HttpResponse
+from django.http.response import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 
+from api.pdf import render_pdf_in_pool
+from api.serializers import BatchSerializer
 from recipes.models import Recipe
+from recipes.relations import link, target_field, unlink
+
+SHOPPING_LIST_TITLE = 'Купить в магазине:'
+
 
+class Echo:
 
-def create_shopping_cart(ingredients):
-    shopping_list = 'Купить в магазине:'
+    def write(self, value):
+        return value
+
+
+def shopping_list_lines(ingredients):
     for ingredient in ingredients:
-        shopping_list += (
-            f"\n{ingredient['ingredient__name']} "
-            f"({ingredient['ingredient__measurement_unit']}) - "
-            f"{ingredient['amount']}")
-    file = 'shopping_list.txt'
-    response = HttpResponse(shopping_list, content_type='text/plain')
-    response['Content-Disposition'] = f'attachment; filename="{file}.txt"'
+        yield (f"{ingredient['ingredient__name']} "
+               f"({ingredient['ingredient__measurement_unit']}) - "
+               f"{ingredient['amount']}")
+
+
+def stream_txt(ingredients):
+    yield SHOPPING_LIST_TITLE
+    for line in shopping_list_lines(ingredients):
+        yield f'\n{line}'
+
+
+def stream_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        yield writer.writerow((ingredient['ingredient__name'],
+                               ingredient['ingredient__measurement_unit'],
+                               ingredient['amount']))
+
+
+def stream_json(ingredients):
+    separator = '['
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'id': ingredient['ingredient__id'],
+            'name': ingredient['ingredient__name'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+            'amount': ingredient['amount'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+SHOPPING_LIST_STREAMS = {
+    'txt': ('text/plain', stream_txt),
+    'csv': ('text/csv', stream_csv),
+    'json': ('application/json', stream_json),
+}
+
+
+def create_shopping_cart(ingredients, file_format='txt'):
+    ingredients = ingredients.iterator(chunk_size=2000)
+    if file_format == 'pdf':
+        response = HttpResponse(
+            render_pdf_in_pool(SHOPPING_LIST_TITLE,
+                               list(shopping_list_lines(ingredients))),
+            content_type='application/pdf'
+        )
+    else:
+        content_type, stream = SHOPPING_LIST_STREAMS[file_format]
+        response = StreamingHttpResponse(
+            stream(ingredients), content_type=f'{content_type}; charset=utf-8'
+        )
+    file = f'shopping_list.{file_format}'
+    response['Content-Disposition'] = f'attachment; filename="{file}"'
     return response
 
 
+def attach_recipes(authors, limit=None):
+    authors = list(authors)
+    recipes = {author.id: [] for author in authors}
+    if recipes and limit is None:
+        for recipe in Recipe.objects.filter(author_id__in=recipes):
+            recipes[recipe.author_id].append(recipe)
+    elif recipes:
+        table = connection.ops.quote_name(Recipe._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(recipes))
+        for recipe in Recipe.objects.raw(
+            'SELECT * FROM ('
+            'SELECT id, name, image, image_variants, cooking_time, author_id, '
+            'ROW_NUMBER() OVER ('
+            'PARTITION BY author_id ORDER BY id DESC) AS row_number '
+            f'FROM {table} WHERE author_id IN ({placeholders})'
+            ') ranked WHERE row_number <= %s ORDER BY id DESC',
+            [*recipes, limit]
+        ):
+            recipes[recipe.author_id].append(recipe)
+    for author in authors:
+        author.recipes_preview = recipes[author.id]
+    return authors
+
+
 def joint_post(user, pk, model, serializer):
-    if not model.objects.filter(user=user, recipe_id=pk).exists():
+    if link(model, user.id, [int(pk)]):
         recipe = get_object_or_404(Recipe, id=pk)
-        model.objects.create(user=user, recipe=recipe)
-        obj_serializer = serializer(recipe)
-        return Response(data=obj_serializer.data,
+        return Response(data=serializer(recipe).data,
                         status=status.HTTP_201_CREATED)
+    get_object_or_404(Recipe, id=pk)
     return Response('Рецепт уже добавлен', status=status.HTTP_400_BAD_REQUEST)
 
 
 def joint_delete(user, pk, model):
-    post = model.objects.filter(user=user, recipe__id=pk)
-    if post.exists():
-        post.delete()
+    if unlink(model, user.id, [int(pk)]):
         return Response(status=status.HTTP_204_NO_CONTENT)
     return Response('Рецепт уже удален', status=status.HTTP_400_BAD_REQUEST)
+
+
+def joint_batch(request, model):
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = list(dict.fromkeys(serializer.validated_data['ids']))
+    if request.method == 'POST':
+        done = set(link(model, request.user.id, ids))
+        rest = [pk for pk in ids if pk not in done]
+        found = set(target_field(model).related_model.objects.filter(
+            pk__in=rest
+        ).values_list('pk', flat=True)) if rest else set()
+        success = status.HTTP_201_CREATED
+    else:
+        done = set(unlink(model, request.user.id, ids))
+        found = set()
+        success = status.HTTP_204_NO_CONTENT
+    return Response({'results': [
+        {'id': pk, 'status': success if pk in done else (
+            status.HTTP_400_BAD_REQUEST
+            if pk in found or request.method == 'DELETE'
+            else status.HTTP_404_NOT_FOUND
+        )}
+        for pk in ids
+    ]})
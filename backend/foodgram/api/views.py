@@ -1,49 +1,144 @@
-from django.db.models import Sum
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api.autocomplete import search_ingredients
+from api.catalog import get_catalog
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import CustomPagination
+from api.mixins import AnonymousCacheMixin, ConditionalGetMixin
+from api.pagination import CustomPagination, FeedPagination
 from api.permissions import IsAdminOrReadOnly, IsOwnerOrReadOnly
-from api.serializers import (CustomUserSerializer, IngredientSerializer,
-                             RecipeMiniSerializer, ReadRecipeSerializer,
-                             CreateRecipeSerializer, TagSerializer,
+from api.renderers import CSVRenderer, PDFRenderer, TextRenderer
+from api.serializers import (CustomUserSerializer, ImageUploadSerializer,
+                             IngredientSerializer, RecipeMiniSerializer,
+                             ReadRecipeSerializer, CreateRecipeSerializer,
+                             TagSerializer, UserCountsSerializer,
                              UserSubscription)
-from recipes.models import (Favorite, Ingredient, IngredientinRecipe, Recipe,
-                            Shopping, Tag)
+from api.uploads import ImageUploadParser
+from recipes.feed import feed_ids
+from recipes.models import (Favorite, Ingredient, IngredientinRecipe,
+                            IngredientinShopping, Recipe, Shopping, Tag)
+from recipes.relations import link, unlink
 from users.models import Follow, User
-from .utils import create_shopping_cart, joint_post, joint_delete
+from .utils import (attach_recipes, create_shopping_cart, joint_batch,
+                    joint_delete, joint_post)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    version_names = ('tags',)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    version_names = ('ingredients',)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    @action(detail=False)
+    def autocomplete(self, request):
+        query = request.query_params.get('name', '').strip()
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), 50) if limit.isdigit() else 10
+        if not query or not limit:
+            return Response([])
+        serializer = self.get_serializer(
+            search_ingredients(query, limit), many=True
+        )
+        return Response(serializer.data)
+
+
+class CatalogView(APIView):
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, version=None):
+        current, content, compressed = get_catalog()
+        if version is not None and version != current:
+            return HttpResponseRedirect(
+                reverse('api:catalog-version', args=(current,))
+            )
+        etag = f'"{current}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(compressed,
+                                    content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            'no-cache' if version is None
+            else 'public, max-age=31536000, immutable'
+        )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(ConditionalGetMixin, UserViewSet):
+    version_names = ('users',)
     queryset = User.objects.all()
     permission_classes = (IsOwnerOrReadOnly,)
     serializer_class = CustomUserSerializer
     pagination_class = CustomPagination
+    cursor_orderings = ('id',)
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = super().get_queryset()
+        if user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Follow.objects.filter(user=user, following=OuterRef('pk'))
+            ))
+        else:
+            queryset = queryset.annotate(is_subscribed=Value(False))
+        return queryset
+
+    def get_instance(self):
+        return get_object_or_404(self.get_queryset(), pk=self.request.user.pk)
+
+    def get_permissions(self):
+        if self.action == 'me':
+            return (permissions.IsAuthenticated(),)
+        return super().get_permissions()
+
+    def get_serializer_class(self):
+        if (self.action in ('list', 'retrieve', 'me')
+                and self.request.method == 'GET'):
+            if self.request.query_params.get('include') == 'counts':
+                return UserCountsSerializer
+            return CustomUserSerializer
+        return super().get_serializer_class()
 
     @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
     def subscriptions(self, request):
+        return self.conditional(self.get_subscriptions, request)
+
+    def get_subscriptions(self, request):
         user = self.request.user
-        subs = User.objects.filter(following__user=user)
-        page = self.paginate_queryset(subs)
+        subs = User.objects.filter(following__user=user).annotate(
+            is_subscribed=Value(True)
+        ).order_by('id')
+        limit = request.query_params.get('recipes_limit')
+        page = attach_recipes(
+            self.paginate_queryset(subs),
+            int(limit) if limit and limit.isdigit() else None
+        )
         serializer = UserSubscription(
             page, many=True, context={'request': request})
         return self.get_paginated_response(serializer.data)
@@ -53,31 +148,90 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def subscribe(self, request, id):
-        following = get_object_or_404(User, pk=id)
-        if request.method == 'POST':
-            serializer = UserSubscription(
-                following, data=request.data, context={'request': request}
-            )
-            if serializer.is_valid():
-                Follow.objects.create(user=request.user, following=following)
-                return Response(data=serializer.data,
-                                status=status.HTTP_201_CREATED)
+        if request.method == 'DELETE':
+            if not unlink(Follow, request.user.id, [int(id)]):
+                raise Http404
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not link(Follow, request.user.id, [int(id)]):
+            get_object_or_404(User, pk=id)
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        follow = get_object_or_404(
-            Follow, user=request.user, following=following
-        )
-        follow.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        following = User.objects.annotate(
+            is_subscribed=Value(True)
+        ).get(pk=id)
+        serializer = UserSubscription(following, context={'request': request})
+        return Response(data=serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['post', 'delete'], detail=False, url_path='subscribe',
+            url_name='subscribe-batch',
+            permission_classes=(permissions.IsAuthenticated,))
+    def subscribe_batch(self, request):
+        return joint_batch(request, Follow)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, AnonymousCacheMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (IsOwnerOrReadOnly,)
     serializer_class = ReadRecipeSerializer
     pagination_class = CustomPagination
-    filter_backends = (DjangoFilterBackend,)
+    cursor_orderings = ('-id', 'id', '-modified', '-favorites_count')
+    lookup_value_regex = r'\d+'
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    ordering_fields = ('id', 'modified', 'favorites_count')
     filterset_class = RecipeFilter
 
+    @property
+    def version_names(self):
+        names = ('recipes', 'tags', 'ingredients', 'users')
+        ordering = self.request.query_params.get('ordering', '')
+        if 'favorites_count' in ordering:
+            names += ('favorites',)
+        return names
+
+    cache_version_names = version_names
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Recipe.objects.select_related('author').defer(
+            'search_vector', 'ingredient_ids'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_in_recipe',
+                queryset=IngredientinRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Shopping.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            author_is_subscribed=Exists(Follow.objects.filter(
+                user=user, following=OuterRef('author')
+            )),
+        )
+
+    def get_validators(self):
+        versions, last_modified = super().get_validators()
+        if self.action != 'retrieve':
+            return versions, last_modified
+        modified = Recipe.objects.filter(pk=self.kwargs['pk']).values_list(
+            'modified', flat=True
+        ).first()
+        if modified is not None:
+            last_modified = max(last_modified, modified.timestamp())
+        return [*versions, modified], last_modified
+
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return CreateRecipeSerializer
@@ -86,25 +240,65 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @action(methods=['post', 'delete'], detail=True)
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
+    def feed(self, request):
+        paginator = FeedPagination()
+        ids = paginator.paginate_ids(
+            lambda before, limit: feed_ids(request.user.id, before, limit),
+            request
+        )
+        serializer = self.get_serializer(
+            self.get_queryset().filter(pk__in=ids).order_by('-id'), many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['post'], detail=False, url_path='images',
+            permission_classes=(permissions.IsAuthenticated,),
+            parser_classes=(ImageUploadParser,))
+    def upload_image(self, request):
+        serializer = ImageUploadSerializer(data=request.data,
+                                           context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['post', 'delete'], detail=True,
+            permission_classes=(permissions.IsAuthenticated,))
     def shopping_cart(self, request, pk):
         if request.method == 'POST':
             return joint_post(request.user, pk, Shopping,
                               RecipeMiniSerializer)
         return joint_delete(request.user, pk, Shopping)
 
-    @action(methods=['post', 'delete'], detail=True)
+    @action(methods=['post', 'delete'], detail=True,
+            permission_classes=(permissions.IsAuthenticated,))
     def favorite(self, request, pk):
         if request.method == 'POST':
             return joint_post(request.user, pk, Favorite,
                               RecipeMiniSerializer)
         return joint_delete(request.user, pk, Favorite)
 
-    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
+    @action(methods=['post', 'delete'], detail=False,
+            url_path='shopping_cart', url_name='shopping-cart-batch',
+            permission_classes=(permissions.IsAuthenticated,))
+    def shopping_cart_batch(self, request):
+        return joint_batch(request, Shopping)
+
+    @action(methods=['post', 'delete'], detail=False, url_path='favorite',
+            url_name='favorite-batch',
+            permission_classes=(permissions.IsAuthenticated,))
+    def favorite_batch(self, request):
+        return joint_batch(request, Favorite)
+
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,),
+            renderer_classes=(TextRenderer, CSVRenderer, JSONRenderer,
+                              PDFRenderer))
     def download_shopping_cart(self, request):
-        ingredients = IngredientinRecipe.objects.filter(
-            recipe__users_shopping_list__user=request.user
-        ).order_by('ingredient__name').values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        return create_shopping_cart(ingredients)
+        ingredients = IngredientinShopping.objects.filter(
+            user=request.user
+        ).values(
+            'ingredient__id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ).order_by('ingredient__name')
+        return create_shopping_cart(ingredients,
+                                    request.accepted_renderer.format)
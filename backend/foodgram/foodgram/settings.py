@@ -73,7 +73,7 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'arhnokard'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
@@ -83,6 +83,37 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+PAGINATION_COUNT_STRATEGY = os.getenv('PAGINATION_COUNT_STRATEGY', 'exact')
+PAGINATION_COUNT_TIMEOUT = int(os.getenv('PAGINATION_COUNT_TIMEOUT', 60))
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', 100))
+ADMIN_COUNT_LIMIT = int(os.getenv('ADMIN_COUNT_LIMIT', 10_000))
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 100))
+
+PDF_FONT_PATH = os.getenv(
+    'PDF_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', 2))
+PDF_TIMEOUT = int(os.getenv('PDF_TIMEOUT', 25))
+
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', 10 * 2 ** 20))
+IMAGE_MAX_SIDE = int(os.getenv('IMAGE_MAX_SIDE', 8000))
+IMAGE_TOKEN_MAX_AGE = int(os.getenv('IMAGE_TOKEN_MAX_AGE', 24 * 60 * 60))
+MEDIA_GRACE_PERIOD = int(os.getenv('MEDIA_GRACE_PERIOD', IMAGE_TOKEN_MAX_AGE))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -124,6 +155,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static_backend/')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+DEFAULT_FILE_STORAGE = 'recipes.storage.ContentAddressedStorage'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
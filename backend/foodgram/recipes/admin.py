@@ -2,58 +2,111 @@ from django.contrib import admin
 
 from recipes.models import (Favorite, Ingredient, IngredientinRecipe, Recipe,
                             Shopping, Tag)
+from recipes.admin_tools import ScalableAdmin, autocomplete_filter
+from recipes.images import schedule_variants
+from recipes.search import update_recipe_indexes
+from recipes.shopping import add_to_carts, remove_from_carts
+from recipes.versions import bump_version
+
+
+AuthorFilter = autocomplete_filter('author', 'Автор')
+RecipeFilter = autocomplete_filter('recipe', 'Рецепт')
+IngredientFilter = autocomplete_filter('ingredient', 'Ингредиент')
+UserFilter = autocomplete_filter('user', 'Пользователь')
 
 
 class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'color', 'slug')
+    search_fields = ('name', 'slug')
 
 
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(ScalableAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
-    search_fields = ('name',)
+    list_filter = ('measurement_unit',)
+    search_fields = ('^name',)
 
 
 class IngredientinRecipeInline(admin.TabularInline):
     model = IngredientinRecipe
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
-class RecipeFilter(admin.SimpleListFilter):
-    title = 'Рецепт'
-    parameter_name = 'recipe'
-
-    def lookups(self, request, model_admin):
-        recipes = set(
-            IngredientinRecipe.objects.values_list(
-                'recipe__id', 'recipe__name')
-        )
-        return recipes
-
-    def queryset(self, request, queryset):
-        if self.value():
-            return queryset.filter(recipe__id=self.value())
-
-
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'add_in_favorites')
-    list_filter = ('author', 'name', 'tags')
-    search_fields = ('author__email', 'name', 'tags__name')
+class RecipeAdmin(ScalableAdmin):
+    list_display = ('name', 'author', 'add_in_favorites', 'in_carts_count',
+                    'modified')
+    list_filter = (AuthorFilter, 'tags')
+    list_select_related = ('author',)
+    search_fields = ('^name', '=author__email')
+    autocomplete_fields = ('author', 'tags')
     inlines = [IngredientinRecipeInline]
+    readonly_fields = ('image_variants', 'favorites_count', 'in_carts_count')
 
     def add_in_favorites(self, obj):
-        return obj.users_favorite.count()
+        return obj.favorites_count
 
     add_in_favorites.short_description = 'Добавлен в избранное'
+    add_in_favorites.admin_order_field = 'favorites_count'
 
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.image_variants = {}
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            schedule_variants(obj.id)
 
-class IngredientinRecipeAdmin(admin.ModelAdmin):
-    list_display = ('recipe', 'ingredient', 'amount')
-    list_filter = (RecipeFilter,)
+    def save_related(self, request, form, formsets, change):
+        remove_from_carts(form.instance.id)
+        super().save_related(request, form, formsets, change)
+        add_to_carts(form.instance.id)
+        update_recipe_indexes([form.instance.id])
 
 
-class FavoriteAdmin(admin.ModelAdmin):
-    list_filter = ('user',)
+class IngredientinRecipeAdmin(ScalableAdmin):
+    list_display = ('recipe', 'ingredient', 'amount')
+    list_filter = (RecipeFilter, IngredientFilter)
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+
+    def save_model(self, request, obj, form, change):
+        remove_from_carts(obj.recipe_id)
+        if change and 'recipe' in form.changed_data:
+            remove_from_carts(form.initial['recipe'])
+        super().save_model(request, obj, form, change)
+        add_to_carts(obj.recipe_id)
+        if change and 'recipe' in form.changed_data:
+            add_to_carts(form.initial['recipe'])
+            update_recipe_indexes([form.initial['recipe']])
+        update_recipe_indexes([obj.recipe_id])
+        bump_version('recipes')
+
+    def delete_model(self, request, obj):
+        remove_from_carts(obj.recipe_id)
+        super().delete_model(request, obj)
+        add_to_carts(obj.recipe_id)
+        update_recipe_indexes([obj.recipe_id])
+        bump_version('recipes')
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe', flat=True))
+        for recipe_id in recipe_ids:
+            remove_from_carts(recipe_id)
+        super().delete_queryset(request, queryset)
+        for recipe_id in recipe_ids:
+            add_to_carts(recipe_id)
+        update_recipe_indexes(recipe_ids)
+        bump_version('recipes')
+
+
+class FavoriteAdmin(ScalableAdmin):
+    list_display = ('user', 'recipe')
+    list_filter = (UserFilter, RecipeFilter)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+
+
+class ShoppingAdmin(FavoriteAdmin):
+    pass
 
 
 admin.site.register(Tag, TagAdmin)
@@ -61,4 +114,4 @@ admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(IngredientinRecipe, IngredientinRecipeAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
-admin.site.register(Shopping)
+admin.site.register(Shopping, ShoppingAdmin)
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from api.pagination import estimate_count
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    template = 'admin/autocomplete_filter.html'
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f'{self.field_name}__pk__exact'
+        super().__init__(request, params, model, model_admin)
+        field = model._meta.get_field(self.field_name)
+        form_field = field.formfield(
+            widget=AutocompleteSelect(field, model_admin.admin_site)
+        )
+        self.widget = form_field.widget
+        self.rendered_widget = self.widget.render(
+            self.parameter_name, self.value(),
+            attrs={'id': f'filter-{self.field_name}',
+                   'data-parameter': self.parameter_name}
+        )
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+def autocomplete_filter(field_name, title):
+    return type(f'{field_name.title()}Filter', (AutocompleteFilter,), {
+        'field_name': field_name, 'title': title,
+    })
+
+
+class BoundedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor == 'postgresql' and not query.where:
+            return estimate_count(self.object_list)
+        return self.object_list.order_by()[
+            :settings.ADMIN_COUNT_LIMIT
+        ].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = BoundedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(isinstance(spec, type) and issubclass(spec, AutocompleteFilter)
+               for spec in self.list_filter):
+            media += AutocompleteSelect(None, self.admin_site).media
+        return media
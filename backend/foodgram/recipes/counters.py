@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from recipes.models import CounterDelta, Favorite, Recipe, Shopping
+from recipes.shopping import table
+from recipes.versions import bump_version
+from users.models import Follow, User
+
+COUNTED = {
+    Favorite: ('recipe_id', Recipe, 'favorites_count'),
+    Shopping: ('recipe_id', Recipe, 'in_carts_count'),
+    Recipe: ('author_id', User, 'recipes_count'),
+    Follow: ('following_id', User, 'followers_count'),
+}
+
+COUNTERS = {
+    (model, field): (sender, attname[:-3])
+    for sender, (attname, model, field) in COUNTED.items()
+}
+
+COUNTER_NAMES = {
+    f'{model._meta.label}.{field}': (model, field)
+    for model, field in COUNTERS
+}
+
+FOLD_LOCK = 0x666f6c64
+
+# Счетчики, которые видны в ответах API, и что обновить вместе с ними.
+TOUCHED = {(Recipe, 'favorites_count'): 'modified'}
+VERSIONS = {
+    (Recipe, 'favorites_count'): 'favorites',
+    (User, 'recipes_count'): 'users',
+    (User, 'followers_count'): 'users',
+}
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+def apply_changes(changes):
+    grouped = defaultdict(list)
+    for (model, field, pk), delta in changes.items():
+        if delta:
+            grouped[model, field, delta].append(pk)
+    for (model, field, delta), pks in grouped.items():
+        values = {field: F(field) + delta}
+        if (model, field) in TOUCHED:
+            values[TOUCHED[model, field]] = timezone.now()
+        model.objects.filter(pk__in=sorted(pks)).update(**values)
+
+
+def fold_counters():
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_try_advisory_xact_lock(%s)',
+                               [FOLD_LOCK])
+                if not cursor.fetchone()[0]:
+                    return
+            cursor.execute(f'DELETE FROM {table(CounterDelta)} '
+                           'RETURNING counter, object_id, delta')
+            rows = cursor.fetchall()
+        changes = defaultdict(int)
+        for counter, pk, delta in rows:
+            model, field = COUNTER_NAMES[counter]
+            changes[model, field, pk] += delta
+        apply_changes(changes)
+        names = {
+            VERSIONS[model, field] for model, field, pk in changes
+            if (model, field) in VERSIONS and changes[model, field, pk]
+        }
+        if names:
+            bump_version(*names)
+
+
+def queue_changes(changes):
+    deltas = [
+        CounterDelta(counter=f'{model._meta.label}.{field}', object_id=pk,
+                     delta=delta)
+        for (model, field, pk), delta in changes.items() if delta
+    ]
+    if deltas:
+        CounterDelta.objects.bulk_create(deltas)
+        transaction.on_commit(fold_counters)
+
+
+def change_counters(sender, instance, delta):
+    attname, model, field = COUNTED[sender]
+    queue_changes({(model, field, getattr(instance, attname)): delta})
+
+
+def recount(model, field, queryset=None):
+    sender, related = COUNTERS[model, field]
+    if queryset is None:
+        queryset = model.objects.all()
+    return queryset.update(**{field: count_related(sender, related)})
@@ -0,0 +1,35 @@
+from django.db import connection
+
+from recipes.models import Recipe
+from users.models import Follow
+
+FEED_SQL = '''
+SELECT recipe.id FROM {follow} follow
+CROSS JOIN LATERAL (
+    SELECT id FROM {recipe}
+    WHERE author_id = follow.following_id {before}
+    ORDER BY id DESC LIMIT %s
+) recipe
+WHERE follow.user_id = %s
+ORDER BY recipe.id DESC LIMIT %s
+'''
+
+
+def feed_ids(user_id, before, limit):
+    if connection.vendor != 'postgresql':
+        recipes = Recipe.objects.filter(author__in=Follow.objects.filter(
+            user_id=user_id
+        ).values('following'))
+        if before is not None:
+            recipes = recipes.filter(id__lt=before)
+        return list(
+            recipes.order_by('-id').values_list('id', flat=True)[:limit]
+        )
+    sql = FEED_SQL.format(
+        follow=Follow._meta.db_table, recipe=Recipe._meta.db_table,
+        before='' if before is None else 'AND id < %s'
+    )
+    params = ([] if before is None else [before]) + [limit, user_id, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
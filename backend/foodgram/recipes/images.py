@@ -0,0 +1,81 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from recipes.versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {'thumbnail': 320, 'medium': 960}
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+VARIANTS_DIR = 'image/variants'
+
+executor = None
+
+
+def normalize(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def save_variant(image, variant, extension):
+    buffer = io.BytesIO()
+    image.save(buffer, FORMATS[extension], quality=settings.IMAGE_QUALITY,
+               optimize=True)
+    return default_storage.save(f'{VARIANTS_DIR}/{variant}.{extension}',
+                                ContentFile(buffer.getvalue()))
+
+
+def build_variants(recipe_id):
+    name = Recipe.objects.filter(id=recipe_id).values_list(
+        'image', flat=True
+    ).first()
+    if not name:
+        return
+    with default_storage.open(name) as file, Image.open(file) as original:
+        image = normalize(original)
+    variants = {}
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = {
+            extension: save_variant(resized, variant, extension)
+            for extension in FORMATS
+        }
+    if Recipe.objects.filter(id=recipe_id, image=name).update(
+        image_variants=variants, modified=timezone.now()
+    ):
+        bump_version('recipes', 'users')
+
+
+def build_variants_in_background(recipe_id):
+    try:
+        build_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать картинку рецепта %s',
+                         recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(recipe_id):
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    transaction.on_commit(
+        partial(executor.submit, build_variants_in_background, recipe_id)
+    )
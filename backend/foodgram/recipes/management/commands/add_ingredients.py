@@ -1,18 +1,99 @@
 import csv
+import itertools
+import json
+import os
+import sys
+import time
 
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 from recipes.models import Ingredient
+from recipes.versions import bump_version
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: нужны название и единица '
+                'измерения'
+            )
+        yield row[0], row[1]
+
+
+def read_json(file, chunk_size=64 * 1024):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    for chunk in iter(lambda: file.read(chunk_size), ''):
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,[]')
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break
+            yield item['name'], item['measurement_unit']
+            buffer = buffer[end:]
+    if buffer.strip(' \t\r\n,[]'):
+        raise CommandError('Некорректный JSON в конце файла')
+
+
+READERS = {'csv': read_csv, 'json': read_json}
 
 
 class Command(BaseCommand):
-    help = 'Загрузка из csv файла'
-
-    def handle(self, *args, **kwargs):
-        with open(
-            'data/ingredients.csv',
-            encoding='UTF-8'
-        ) as file:
-            for row in csv.reader(file):
-                Ingredient.objects.get_or_create(
-                    name=row[0], measurement_unit=row[1])
+    help = 'Загрузка ингредиентов из csv или json файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'),
+            help='Путь к файлу или "-" для чтения из stdin'
+        )
+        parser.add_argument('--format', choices=READERS,
+                            help='По умолчанию определяется по расширению')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'json' if path.endswith(('.json', '.jsonl')) else 'csv'
+        )
+        started = time.monotonic()
+        if path == '-':
+            read, unique = self.load(READERS[file_format](sys.stdin),
+                                     options['batch_size'])
+        else:
+            with open(path, encoding='UTF-8', newline='') as file:
+                read, unique = self.load(READERS[file_format](file),
+                                         options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Прочитано {read}, уникальных {unique} за {elapsed:.2f} с '
+            f'({read / max(elapsed, 1e-6):.0f} строк/с)'
+        )
         self.stdout.write(self.style.SUCCESS('Все ингридиенты загружены!'))
+
+    def load(self, rows, batch_size):
+        seen = set()
+        read = 0
+        with transaction.atomic():
+            while True:
+                chunk = list(itertools.islice(rows, batch_size))
+                if not chunk:
+                    break
+                read += len(chunk)
+                batch = []
+                for name, measurement_unit in chunk:
+                    key = (name.strip(), measurement_unit.strip())
+                    if key not in seen:
+                        seen.add(key)
+                        batch.append(Ingredient(name=key[0],
+                                                measurement_unit=key[1]))
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        bump_version('ingredients')
+        return read, len(seen)
@@ -1,5 +1,6 @@
 from django.core.management import BaseCommand
 from recipes.models import Tag
+from recipes.versions import bump_version
 
 
 class Command(BaseCommand):
@@ -11,4 +12,5 @@ class Command(BaseCommand):
             {'name': 'Обед', 'color': '#49B64E', 'slug': 'dinner'},
             {'name': 'Ужин', 'color': '#8775D2', 'slug': 'supper'}]
         Tag.objects.bulk_create(Tag(**tag) for tag in data)
+        bump_version('tags')
         self.stdout.write(self.style.SUCCESS('Все тэги загружены!'))
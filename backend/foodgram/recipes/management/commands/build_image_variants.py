@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание уменьшенных копий картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать копии для всех рецептов')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by('id')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        done = failed = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator(
+            chunk_size=options['batch_size']
+        ):
+            try:
+                build_variants(recipe_id)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {done}, с ошибками: {failed}'
+        ))
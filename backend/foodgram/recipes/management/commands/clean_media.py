@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from recipes.media import is_recent, recipe_files, referenced_names
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов картинок, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет удалено')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--grace-period', type=int, default=settings.MEDIA_GRACE_PERIOD,
+            help='Не трогать файлы моложе указанного числа секунд'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.removed = self.freed = 0
+        self.referenced = self.load_references()
+        batch = []
+        for name in self.walk('image'):
+            batch.append(name)
+            if len(batch) >= options['batch_size']:
+                self.clean(batch)
+                batch = []
+        self.clean(batch)
+        missing = self.check_references()
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} файлов: {self.removed} '
+            f'({self.freed / 2 ** 20:.1f} МБ), '
+            f'ссылок на отсутствующие файлы: {missing}'
+        ))
+
+    def walk(self, directory):
+        try:
+            directories, files = default_storage.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in files:
+            yield os.path.join(directory, name)
+        for child in directories:
+            yield from self.walk(os.path.join(directory, child))
+
+    def load_references(self):
+        referenced = set()
+        for image, variants in Recipe.objects.values_list(
+            'image', 'image_variants'
+        ).iterator(chunk_size=self.options['batch_size']):
+            referenced |= recipe_files(image, variants)
+        return referenced
+
+    def clean(self, names):
+        orphans = set(names) - self.referenced
+        if orphans:
+            # Рецепт мог сослаться на файл уже после чтения ссылок.
+            orphans -= referenced_names(orphans)
+        for name in sorted(orphans):
+            if is_recent(name, self.options['grace_period']):
+                continue
+            self.removed += 1
+            self.freed += default_storage.size(name)
+            if self.options['verbosity'] > 1:
+                self.stdout.write(name)
+            if not self.options['dry_run']:
+                default_storage.delete(name)
+
+    def check_references(self):
+        missing = 0
+        for name in sorted(self.referenced):
+            if not default_storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Нет файла: {name}')
+        return missing
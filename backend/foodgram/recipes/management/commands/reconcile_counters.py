@@ -0,0 +1,51 @@
+from django.core.management import BaseCommand
+from django.db.models import F, Max
+from recipes.counters import (COUNTERS, count_related, fold_counters,
+                              recount)
+
+
+class Command(BaseCommand):
+    help = 'Сверка и исправление счетчиков рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Исправить найденные расхождения')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        fold_counters()
+        batch_size = options['batch_size']
+        total = 0
+        for (model, field), (sender, related) in COUNTERS.items():
+            drifted = 0
+            last_id = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            for start in range(0, last_id + 1, batch_size):
+                batch = model.objects.filter(
+                    pk__gte=start, pk__lt=start + batch_size
+                )
+                wrong = list(batch.annotate(
+                    actual=count_related(sender, related)
+                ).exclude(**{field: F('actual')}).values_list(
+                    'pk', field, 'actual'
+                ))
+                for pk, stored, actual in wrong:
+                    if options['verbosity'] > 1:
+                        self.stdout.write(
+                            f'{model._meta.label} {pk} {field}: '
+                            f'{stored} -> {actual}'
+                        )
+                if wrong and options['fix']:
+                    recount(model, field, batch.filter(
+                        pk__in=[pk for pk, _, _ in wrong]
+                    ))
+                drifted += len(wrong)
+            self.stdout.write(f'{model._meta.label}.{field}: '
+                              f'расхождений {drifted}')
+            total += drifted
+        style = self.style.WARNING if total and not options['fix'] else (
+            self.style.SUCCESS
+        )
+        self.stdout.write(style(
+            f'Всего расхождений: {total}'
+            + (', исправлено' if total and options['fix'] else '')
+        ))
@@ -0,0 +1,216 @@
+import csv
+import io
+import itertools
+import random
+import time
+from bisect import bisect_left
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes.models import (Favorite, Ingredient, IngredientinRecipe, Recipe,
+                            Shopping, Tag)
+from recipes.counters import COUNTERS, recount
+from recipes.search import update_recipe_indexes
+from recipes.shopping import expected_totals, rebuild_carts
+from recipes.versions import bump_version
+from users.models import Follow, User
+
+
+def power_law(size, skew, rng):
+    weights = [1 / (rank + 1) ** skew for rank in range(size)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def shares(total, size, skew, rng):
+    cum_weights = power_law(size, skew, rng)
+    return [
+        round(total * (weight - previous) / cum_weights[-1])
+        for previous, weight in zip([0, *cum_weights], cum_weights)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных большого объема'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--ingredients', type=int, default=2_000)
+        parser.add_argument('--favorites', type=int, default=10_000_000)
+        parser.add_argument('--carts', type=int, default=10_000_000)
+        parser.add_argument('--follows', type=int, default=5_000_000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель степенного распределения')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=50_000)
+        parser.add_argument('--prefix', default='seed',
+                            help='Префикс имен создаваемых пользователей')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.skew = options['skew']
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            users = self.create_users(options['users'], options['prefix'])
+            tags = self.create_tags()
+            ingredients = self.create_ingredients(options['ingredients'])
+            recipes = self.create_recipes(options['recipes'], users)
+            self.create_recipe_relations(recipes, tags, ingredients)
+            self.create_follows(options['follows'], users)
+            self.create_pairs(Favorite, options['favorites'], users, recipes)
+            self.create_pairs(Shopping, options['carts'], users, recipes)
+            self.fill_carts(users)
+            for model, field in COUNTERS:
+                recount(model, field)
+            for start in range(0, len(recipes), self.batch_size):
+                update_recipe_indexes(recipes[start:start + self.batch_size])
+        bump_version('tags', 'ingredients')
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы!'))
+
+    def write(self, model, fields, rows):
+        started = time.monotonic()
+        total = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            if connection.vendor == 'postgresql':
+                self.copy(model, fields, batch)
+            else:
+                model.objects.bulk_create(
+                    model(**dict(zip(fields, row))) for row in batch
+                )
+            total += len(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model._meta.db_table}: {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def copy(self, model, fields, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f'({columns}) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+
+    def ids(self, queryset):
+        return list(queryset.order_by('id').values_list('id', flat=True))
+
+    def last_id(self, model):
+        return model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+
+    def create_users(self, count, prefix):
+        first_id = self.last_id(User)
+        password = make_password(None)
+        joined = timezone.now()
+        self.write(User, (
+            'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+            'recipes_count', 'followers_count'
+        ), (
+            (password, False, f'{prefix}{i}', 'Имя', 'Фамилия',
+             f'{prefix}{i}@foodgram.ru', False, True, joined, 0, 0)
+            for i in range(count)
+        ))
+        return self.ids(User.objects.filter(id__gt=first_id))
+
+    def create_tags(self):
+        if not Tag.objects.exists():
+            self.write(Tag, ('name', 'color', 'slug'), (
+                ('Завтрак', '#E26C2D', 'breakfast'),
+                ('Обед', '#49B64E', 'dinner'),
+                ('Ужин', '#8775D2', 'supper'),
+            ))
+        return self.ids(Tag.objects.all())
+
+    def create_ingredients(self, count):
+        existing = Ingredient.objects.count()
+        self.write(Ingredient, ('name', 'measurement_unit'), (
+            (f'Ингредиент {i}', self.rng.choice(('г', 'мл', 'шт.')))
+            for i in range(existing, count)
+        ))
+        return self.ids(Ingredient.objects.all())
+
+    def create_recipes(self, count, users):
+        first_id = self.last_id(Recipe)
+        per_author = shares(count, len(users), self.skew, self.rng)
+        modified = timezone.now()
+        self.write(Recipe, (
+            'name', 'author_id', 'text', 'cooking_time', 'image',
+            'image_variants', 'modified', 'favorites_count', 'in_carts_count'
+        ), (
+            (f'Рецепт {author}-{i}', author, 'Описание рецепта',
+             self.rng.randint(1, 180), 'image/seed.png', {}, modified, 0, 0)
+            for author, recipes in zip(users, per_author)
+            for i in range(recipes)
+        ))
+        return self.ids(Recipe.objects.filter(id__gt=first_id))
+
+    def create_recipe_relations(self, recipes, tags, ingredients):
+        self.write(Recipe.tags.through, ('recipe_id', 'tag_id'), (
+            (recipe, tag) for recipe in recipes
+            for tag in self.rng.sample(tags, self.rng.randint(1, len(tags)))
+        ))
+        cum_weights = power_law(len(ingredients), self.skew, self.rng)
+        self.write(IngredientinRecipe, (
+            'recipe_id', 'ingredient_id', 'amount'
+        ), (
+            (recipe, ingredient, self.rng.randint(1, 500))
+            for recipe in recipes
+            for ingredient in self.distinct(
+                ingredients, cum_weights, self.rng.randint(3, 10)
+            )
+        ))
+
+    def create_follows(self, count, users):
+        cum_weights = power_law(len(users), self.skew, self.rng)
+        per_user = shares(count, len(users), 0.5, self.rng)
+        self.write(Follow, ('user_id', 'following_id'), (
+            (user, following) for user, follows in zip(users, per_user)
+            for following in self.distinct(users, cum_weights, follows)
+            if following != user
+        ))
+
+    def create_pairs(self, model, count, users, recipes):
+        cum_weights = power_law(len(recipes), self.skew, self.rng)
+        per_user = shares(count, len(users), self.skew, self.rng)
+        self.write(model, ('user_id', 'recipe_id'), (
+            (user, recipe) for user, pairs in zip(users, per_user)
+            for recipe in self.distinct(recipes, cum_weights, pairs)
+        ))
+
+    def fill_carts(self, users):
+        started = time.monotonic()
+        for start in range(0, len(users), self.batch_size // 100 or 1):
+            batch = users[start:start + self.batch_size // 100 or 1]
+            rebuild_carts(batch, expected_totals(batch))
+        self.stdout.write(
+            f'Списки покупок пересчитаны за '
+            f'{time.monotonic() - started:.1f} с'
+        )
+
+    def distinct(self, population, cum_weights, count):
+        count = min(count, len(population))
+        if count > len(population) // 10:
+            return self.rng.sample(population, count)
+        chosen = set()
+        total = cum_weights[-1]
+        while len(chosen) < count:
+            index = bisect_left(cum_weights, self.rng.random() * total)
+            chosen.add(population[min(index, len(population) - 1)])
+        return chosen
@@ -0,0 +1,55 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from recipes.models import IngredientinShopping, Shopping
+from recipes.shopping import expected_totals, rebuild_carts, stored_totals
+
+
+class Command(BaseCommand):
+    help = 'Проверка и пересчет агрегированных списков покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Перезаписать расхождения пересчитанными')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user_ids = sorted(
+            set(Shopping.objects.values_list('user', flat=True).distinct())
+            | set(IngredientinShopping.objects.values_list(
+                'user', flat=True
+            ).distinct())
+        )
+        drifted_users = 0
+        drifted_rows = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            with transaction.atomic():
+                expected = expected_totals(batch)
+                stored = stored_totals(batch)
+                drift = {
+                    key for key in expected.keys() | stored.keys()
+                    if expected.get(key) != stored.get(key)
+                }
+                if not drift:
+                    continue
+                users = sorted({user for user, _ in drift})
+                drifted_users += len(users)
+                drifted_rows += len(drift)
+                for user, ingredient in sorted(drift):
+                    self.stdout.write(
+                        f'user={user} ingredient={ingredient}: '
+                        f'ожидается {expected.get((user, ingredient), 0)}, '
+                        f'сохранено {stored.get((user, ingredient), 0)}'
+                    )
+                if options['fix']:
+                    rebuild_carts(users, {
+                        key: amount for key, amount in expected.items()
+                        if key[0] in users
+                    })
+        message = (f'Проверено пользователей: {len(user_ids)}, '
+                   f'расхождений: {drifted_rows} у {drifted_users}')
+        if drifted_rows and not options['fix']:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from recipes.images import FORMATS, VARIANTS
+from recipes.models import Recipe
+
+
+def recipe_files(image, variants):
+    names = {image} if image else set()
+    for files in (variants or {}).values():
+        names.update(files.values())
+    return names
+
+
+def referenced_names(names):
+    names = list(names)
+    if not names:
+        return set()
+    condition = Q(image__in=names)
+    for variant in VARIANTS:
+        for extension in FORMATS:
+            condition |= Q(**{
+                f'image_variants__{variant}__{extension}__in': names
+            })
+    referenced = set()
+    for image, variants in Recipe.objects.filter(condition).values_list(
+        'image', 'image_variants'
+    ):
+        referenced |= recipe_files(image, variants)
+    return referenced & set(names)
+
+
+def is_recent(name, grace_period):
+    try:
+        modified = default_storage.get_modified_time(name).timestamp()
+    except FileNotFoundError:
+        return True
+    return time.time() - modified < grace_period
+
+
+def release_files(names, grace_period=None):
+    if grace_period is None:
+        grace_period = settings.MEDIA_GRACE_PERIOD
+    released = []
+    for name in set(names) - referenced_names(names):
+        if not is_recent(name, grace_period):
+            default_storage.delete(name)
+            released.append(name)
+    return released
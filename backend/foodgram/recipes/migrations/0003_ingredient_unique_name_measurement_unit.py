@@ -0,0 +1,60 @@
+# Generated by Django 3.2 on 2026-10-18 01:44
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientinRecipe = apps.get_model('recipes', 'IngredientinRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    for duplicate in duplicates:
+        rows = IngredientinRecipe.objects.filter(
+            ingredient__name=duplicate['name'],
+            ingredient__measurement_unit=duplicate['measurement_unit'],
+        )
+        kept = list(rows.order_by().values('recipe').annotate(
+            row=Min('id')
+        ).values_list('row', flat=True))
+        IngredientinRecipe.objects.filter(id__in=kept).update(
+            amount=Subquery(rows.filter(recipe=OuterRef('recipe')).order_by(
+            ).values('recipe').annotate(total=Sum('amount')).values('total'))
+        )
+        rows.exclude(id__in=kept).delete()
+        IngredientinRecipe.objects.filter(id__in=kept).update(
+            ingredient=duplicate['keep']
+        )
+        Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredientinrecipe',
+            name='amount',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1, message='Количество ингредиента должно быть больше 0!')], verbose_name='Количество ингредиента'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='cooking_time',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1, message='Время готовки должно быть не меньше 1')], verbose_name='Время приготовления (в минутах)'),
+        ),
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_name_measurement_unit'),
+        ),
+    ]
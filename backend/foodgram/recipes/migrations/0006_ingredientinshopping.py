@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 01:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def fill_shopping_totals(apps, schema_editor):
+    IngredientinRecipe = apps.get_model('recipes', 'IngredientinRecipe')
+    IngredientinShopping = apps.get_model('recipes', 'IngredientinShopping')
+    IngredientinShopping.objects.bulk_create(
+        (IngredientinShopping(user_id=row['recipe__users_shopping_list__user'],
+                              ingredient_id=row['ingredient'],
+                              amount=row['total'])
+         for row in IngredientinRecipe.objects.filter(
+             recipe__users_shopping_list__isnull=False
+        ).order_by().values(
+            'recipe__users_shopping_list__user', 'ingredient'
+        ).annotate(total=Sum('amount')).iterator()),
+        batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0005_recipe_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientinShopping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(verbose_name='Количество ингредиента')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='in_shopping_lists', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент к покупке',
+                'verbose_name_plural': 'Ингредиенты к покупке',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ingredientinshopping',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_ingredient'),
+        ),
+        migrations.RunPython(fill_shopping_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 02:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes', 'Recipe', 'favorites_count', 'Favorite', 'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count', 'Shopping', 'recipe'),
+    ('users', 'User', 'recipes_count', 'Recipe', 'author'),
+    ('users', 'User', 'followers_count', 'Follow', 'following'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, related_model, related_field in COUNTERS:
+        related = apps.get_model(
+            'users' if related_model == 'Follow' else 'recipes', related_model
+        )
+        apps.get_model(app, model).objects.update(**{field: Coalesce(
+            Subquery(related.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(related_field).annotate(
+                count=Count('pk')
+            ).values('count')), 0
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_variants'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.IntegerField(db_index=True, default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
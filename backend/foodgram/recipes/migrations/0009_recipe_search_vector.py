@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 02:06
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector '
+    'ON recipes_recipe USING gin (search_vector)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipes_recipe_search_vector'
+FILL_VECTORS = '''
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', name), 'A')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_ingredientinrecipe amount
+        JOIN recipes_ingredient ingredient
+        ON ingredient.id = amount.ingredient_id
+        WHERE amount.recipe_id = recipes_recipe.id
+    ), '')), 'B')
+    || setweight(to_tsvector('russian', text), 'C')
+'''
+
+
+def run_on_postgresql(*statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FILL_VECTORS, CREATE_INDEX),
+            run_on_postgresql(DROP_INDEX),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 02:07
+
+from django.db import migrations, models
+import recipes.models
+
+FILL_IDS = '''
+UPDATE recipes_recipe SET ingredient_ids = coalesce((
+    SELECT array_agg(ingredient_id ORDER BY ingredient_id)
+    FROM recipes_ingredientinrecipe
+    WHERE recipe_id = recipes_recipe.id
+), '{}')
+'''
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS recipes_recipe_ingredient_ids '
+    'ON recipes_recipe USING gin (ingredient_ids)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipes_recipe_ingredient_ids'
+
+
+def run_on_postgresql(*statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_ids',
+            field=recipes.models.IdArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FILL_IDS, CREATE_INDEX),
+            run_on_postgresql(DROP_INDEX),
+        ),
+    ]
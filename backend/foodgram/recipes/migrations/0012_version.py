@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_author_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Version',
+            fields=[
+                ('name', models.CharField(max_length=150, primary_key=True, serialize=False, verbose_name='Название')),
+                ('value', models.BigIntegerField(verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+    ]
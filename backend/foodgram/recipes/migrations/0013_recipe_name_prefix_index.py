@@ -0,0 +1,29 @@
+from django.db import migrations
+
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS recipes_recipe_name_upper_like '
+    'ON recipes_recipe (UPPER(name) text_pattern_ops)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipes_recipe_name_upper_like'
+
+
+def run_on_postgresql(*statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_INDEX),
+            run_on_postgresql(DROP_INDEX),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_popular_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('counter', models.CharField(max_length=150, verbose_name='Счетчик')),
+                ('object_id', models.IntegerField(verbose_name='Объект')),
+                ('delta', models.IntegerField(verbose_name='Изменение')),
+            ],
+            options={
+                'verbose_name': 'Изменение счетчика',
+                'verbose_name_plural': 'Изменения счетчиков',
+            },
+        ),
+    ]
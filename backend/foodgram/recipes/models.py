@@ -1,9 +1,23 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 
 from users.models import User
 
 
+class IdArrayField(ArrayField):
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('base_field', models.IntegerField())
+        super().__init__(**kwargs)
+
+    def get_placeholder(self, value, compiler, connection):
+        if connection.vendor == 'postgresql':
+            return super().get_placeholder(value, compiler, connection)
+        return '%s'
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=200, unique=True,
                             verbose_name='Название')
@@ -33,6 +47,11 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_name_measurement_unit'),
+        ]
         verbose_name = ('Ингредиент')
         verbose_name_plural = ('Ингредиенты')
 
@@ -61,9 +80,29 @@ class Recipe(models.Model):
         )], verbose_name='Время приготовления (в минутах)',
     )
     image = models.ImageField(upload_to='image/', verbose_name='Картинка')
+    image_variants = models.JSONField(default=dict, blank=True,
+                                      verbose_name='Уменьшенные копии')
+    modified = models.DateTimeField(auto_now=True,
+                                    verbose_name='Дата изменения')
+    favorites_count = models.IntegerField(
+        default=0, editable=False,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.IntegerField(
+        default=0, editable=False, verbose_name='В списках покупок'
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    ingredient_ids = IdArrayField(null=True, editable=False)
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['author', '-id'], name='recipe_author_feed'),
+            models.Index(fields=['modified', 'id'],
+                         name='recipe_modified_keyset'),
+            models.Index(fields=['favorites_count', 'id'],
+                         name='recipe_popular_keyset'),
+        ]
         verbose_name = ('Рецепт')
         verbose_name_plural = ('Рецепты')
 
@@ -143,3 +182,52 @@ class Shopping(models.Model):
 
     def __str__(self):
         return f'{self.user} -> {self.recipe}'
+
+
+class IngredientinShopping(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='shopping_ingredients', verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE,
+        related_name='in_shopping_lists', verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField(verbose_name='Количество ингредиента')
+
+    class Meta:
+        verbose_name = ('Ингредиент к покупке')
+        verbose_name_plural = ('Ингредиенты к покупке')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ingredient'],
+                                    name='unique_shopping_ingredient')
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.ingredient} {self.amount}'
+
+
+class Version(models.Model):
+    name = models.CharField(max_length=150, primary_key=True,
+                            verbose_name='Название')
+    value = models.BigIntegerField(verbose_name='Значение')
+
+    class Meta:
+        verbose_name = ('Версия данных')
+        verbose_name_plural = ('Версии данных')
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class CounterDelta(models.Model):
+    counter = models.CharField(max_length=150, verbose_name='Счетчик')
+    object_id = models.IntegerField(verbose_name='Объект')
+    delta = models.IntegerField(verbose_name='Изменение')
+
+    class Meta:
+        verbose_name = ('Изменение счетчика')
+        verbose_name_plural = ('Изменения счетчиков')
+
+    def __str__(self):
+        return f'{self.counter} {self.object_id}: {self.delta:+}'
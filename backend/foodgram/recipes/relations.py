@@ -0,0 +1,72 @@
+from django.db import connection, transaction
+
+from recipes.counters import COUNTED, queue_changes
+from recipes.models import Favorite, Shopping
+from recipes.shopping import (add_recipes_to_cart, remove_recipes_from_cart,
+                              table)
+from recipes.versions import bump_version
+from users.models import Follow
+
+TARGETS = {
+    Favorite: 'recipe',
+    Shopping: 'recipe',
+    Follow: 'following',
+}
+
+
+def target_field(model):
+    return model._meta.get_field(TARGETS[model])
+
+
+def relations_changed(model, user_id, target_ids, delta):
+    _, counted, field = COUNTED[model]
+    queue_changes({
+        (counted, field, target_id): delta for target_id in target_ids
+    })
+    if model is Shopping:
+        if delta > 0:
+            add_recipes_to_cart(user_id, target_ids)
+        else:
+            remove_recipes_from_cart(user_id, target_ids)
+    bump_version(f'user:{user_id}')
+
+
+def link(model, user_id, target_ids):
+    field = target_field(model)
+    placeholders = ', '.join(['%s'] * len(target_ids))
+    sql = (
+        f'INSERT INTO {table(model)} (user_id, {field.column}) '
+        f'SELECT %s, id FROM {table(field.related_model)} '
+        f'WHERE id IN ({placeholders})'
+    )
+    params = [user_id, *target_ids]
+    if model is Follow:
+        sql += ' AND id <> %s'
+        params.append(user_id)
+    sql += (
+        f' ON CONFLICT (user_id, {field.column}) DO NOTHING '
+        f'RETURNING {field.column}'
+    )
+    with transaction.atomic(savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            created = [row[0] for row in cursor.fetchall()]
+        if created:
+            relations_changed(model, user_id, created, 1)
+    return created
+
+
+def unlink(model, user_id, target_ids):
+    column = target_field(model).column
+    placeholders = ', '.join(['%s'] * len(target_ids))
+    with transaction.atomic(savepoint=False):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table(model)} WHERE user_id = %s '
+                f'AND {column} IN ({placeholders}) RETURNING {column}',
+                [user_id, *target_ids]
+            )
+            deleted = [row[0] for row in cursor.fetchall()]
+        if deleted:
+            relations_changed(model, user_id, deleted, -1)
+    return deleted
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (Case, Count, Exists, F, IntegerField, OuterRef,
+                              Q, Subquery, Value, When)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from recipes.models import IngredientinRecipe, Recipe
+
+
+def search_document():
+    ingredient_names = Subquery(
+        IngredientinRecipe.objects.filter(recipe=OuterRef('pk')).order_by(
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+    )
+    config = settings.SEARCH_CONFIG
+    return (
+        SearchVector('name', weight='A', config=config)
+        + SearchVector(Coalesce(ingredient_names, Value('')), weight='B',
+                       config=config)
+        + SearchVector('text', weight='C', config=config)
+    )
+
+
+def ingredient_id_array():
+    array = ArrayField(IntegerField())
+    return Coalesce(Subquery(
+        IngredientinRecipe.objects.filter(recipe=OuterRef('pk')).order_by(
+        ).values('recipe').annotate(
+            ids=ArrayAgg('ingredient_id', ordering='ingredient_id')
+        ).values('ids'),
+        output_field=array
+    ), Value([], output_field=array))
+
+
+def update_recipe_indexes(recipes):
+    if connection.vendor == 'postgresql':
+        Recipe.objects.filter(pk__in=recipes).update(
+            search_vector=search_document(),
+            ingredient_ids=ingredient_id_array(),
+        )
+
+
+def search_recipes(queryset, text):
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=settings.SEARCH_CONFIG,
+                            search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-id')
+    in_ingredients = Exists(IngredientinRecipe.objects.filter(
+        recipe=OuterRef('pk'), ingredient__name__icontains=text
+    ))
+    return queryset.annotate(in_ingredients=in_ingredients).filter(
+        Q(name__icontains=text) | Q(text__icontains=text)
+        | Q(in_ingredients=True)
+    ).annotate(rank=Case(
+        When(name__icontains=text, then=3),
+        When(in_ingredients=True, then=2),
+        default=1, output_field=IntegerField(),
+    )).order_by('-rank', '-id')
+
+
+def recipe_ingredients(ingredient_ids):
+    return IngredientinRecipe.objects.filter(
+        recipe=OuterRef('pk'), ingredient_id__in=ingredient_ids
+    )
+
+
+def with_ingredients(queryset, ingredient_ids):
+    if connection.vendor == 'postgresql':
+        return queryset.filter(ingredient_ids__contains=ingredient_ids)
+    for ingredient_id in ingredient_ids:
+        queryset = queryset.filter(Exists(recipe_ingredients([ingredient_id])))
+    return queryset
+
+
+def without_ingredients(queryset, ingredient_ids):
+    if connection.vendor == 'postgresql':
+        return queryset.exclude(ingredient_ids__overlap=ingredient_ids)
+    return queryset.filter(~Exists(recipe_ingredients(ingredient_ids)))
+
+
+def cookable_with(queryset, ingredient_ids, max_missing):
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(
+            ingredient_ids__overlap=ingredient_ids
+        ).annotate(missing=RawSQL(
+            'cardinality(ingredient_ids) - cardinality(ARRAY('
+            'SELECT unnest(ingredient_ids) INTERSECT '
+            'SELECT unnest(%s::integer[])))', (ingredient_ids,)
+        ))
+    else:
+        queryset = queryset.filter(
+            Exists(recipe_ingredients(ingredient_ids))
+        ).annotate(missing=Coalesce(Subquery(
+            IngredientinRecipe.objects.filter(recipe=OuterRef('pk')).exclude(
+                ingredient_id__in=ingredient_ids
+            ).order_by().values('recipe').annotate(
+                count=Count('pk')
+            ).values('count')
+        ), 0))
+    return queryset.filter(missing__lte=max_missing).order_by('missing', '-id')
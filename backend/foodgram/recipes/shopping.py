@@ -0,0 +1,105 @@
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Sum
+
+from recipes.models import IngredientinRecipe, IngredientinShopping, Shopping
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def add_to_carts(recipe_id, user_id=None):
+    totals = table(IngredientinShopping)
+    sql = (
+        f'INSERT INTO {totals} (user_id, ingredient_id, amount) '
+        f'SELECT shopping.user_id, ingredient.ingredient_id, '
+        f'ingredient.amount '
+        f'FROM {table(Shopping)} shopping '
+        f'JOIN {table(IngredientinRecipe)} ingredient '
+        f'ON ingredient.recipe_id = shopping.recipe_id '
+        f'WHERE shopping.recipe_id = %s'
+    )
+    params = [recipe_id]
+    if user_id is not None:
+        sql += ' AND shopping.user_id = %s'
+        params.append(user_id)
+    sql += (
+        ' ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+        f'SET amount = {totals}.amount + EXCLUDED.amount'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def add_recipes_to_cart(user_id, recipe_ids):
+    totals = table(IngredientinShopping)
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {totals} (user_id, ingredient_id, amount) '
+            f'SELECT %s, ingredient_id, SUM(amount) '
+            f'FROM {table(IngredientinRecipe)} '
+            f'WHERE recipe_id IN ({placeholders}) GROUP BY ingredient_id '
+            'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+            f'SET amount = {totals}.amount + EXCLUDED.amount',
+            [user_id, *recipe_ids]
+        )
+
+
+def remove_recipes_from_cart(user_id, recipe_ids):
+    ingredients = IngredientinRecipe.objects.filter(recipe_id__in=recipe_ids)
+    IngredientinShopping.objects.filter(
+        user_id=user_id, ingredient__in=ingredients.values('ingredient')
+    ).update(amount=F('amount') - Subquery(
+        ingredients.filter(ingredient=OuterRef('ingredient')).order_by(
+        ).values('ingredient').annotate(total=Sum('amount')).values('total')
+    ))
+    IngredientinShopping.objects.filter(
+        user_id=user_id, amount__lte=0
+    ).delete()
+
+
+def remove_from_carts(recipe_id, user_id=None):
+    if user_id is None:
+        users = Shopping.objects.filter(recipe_id=recipe_id).values('user')
+    else:
+        users = [user_id]
+    ingredients = IngredientinRecipe.objects.filter(recipe_id=recipe_id)
+    IngredientinShopping.objects.filter(
+        user__in=users, ingredient__in=ingredients.values('ingredient')
+    ).update(amount=F('amount') - Subquery(
+        ingredients.filter(ingredient=OuterRef('ingredient')).values('amount')
+    ))
+    IngredientinShopping.objects.filter(
+        user__in=users, amount__lte=0
+    ).delete()
+
+
+def expected_totals(user_ids):
+    return {
+        (row['recipe__users_shopping_list__user'], row['ingredient']):
+        row['total']
+        for row in IngredientinRecipe.objects.filter(
+            recipe__users_shopping_list__user__in=user_ids
+        ).order_by().values(
+            'recipe__users_shopping_list__user', 'ingredient'
+        ).annotate(total=Sum('amount'))
+    }
+
+
+def stored_totals(user_ids):
+    return {
+        (row['user'], row['ingredient']): row['amount']
+        for row in IngredientinShopping.objects.filter(
+            user__in=user_ids
+        ).values('user', 'ingredient', 'amount')
+    }
+
+
+def rebuild_carts(user_ids, totals):
+    IngredientinShopping.objects.filter(user__in=user_ids).delete()
+    IngredientinShopping.objects.bulk_create(
+        IngredientinShopping(user_id=user, ingredient_id=ingredient,
+                             amount=amount)
+        for (user, ingredient), amount in totals.items()
+    )
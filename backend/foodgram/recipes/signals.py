@@ -0,0 +1,117 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from recipes.counters import change_counters
+from recipes.media import recipe_files, release_files
+from recipes.models import Favorite, Ingredient, Recipe, Shopping, Tag
+from recipes.search import update_recipe_indexes
+from recipes.shopping import add_to_carts, remove_from_carts
+from recipes.versions import bump_version
+from users.models import Follow, User
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    bump_version('ingredients')
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'name' in update_fields):
+        update_recipe_indexes(Recipe.objects.filter(
+            ingredients_in_recipe__ingredient=instance
+        ).values('pk'))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleted(instance, **kwargs):
+    recipes = list(Recipe.objects.filter(
+        ingredients_in_recipe__ingredient=instance
+    ).values_list('pk', flat=True))
+    if recipes:
+        transaction.on_commit(partial(update_recipe_indexes, recipes))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    bump_version('tags')
+
+
+@receiver((post_save, post_delete), sender=User)
+def users_changed(update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_version('users')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipes_changed(**kwargs):
+    bump_version('recipes', 'users')
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=Shopping)
+@receiver((post_save, post_delete), sender=Follow)
+def user_relations_changed(instance, **kwargs):
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Shopping)
+def recipe_added_to_cart(instance, created, **kwargs):
+    if created:
+        add_to_carts(instance.recipe_id, instance.user_id)
+
+
+@receiver(pre_delete, sender=Shopping)
+def recipe_removed_from_cart(instance, **kwargs):
+    remove_from_carts(instance.recipe_id, instance.user_id)
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_recipe_files(instance, update_fields=None, **kwargs):
+    if instance.pk is None or update_fields is not None and not (
+        {'image', 'image_variants'} & set(update_fields)
+    ):
+        return
+    previous = Recipe.objects.filter(pk=instance.pk).values_list(
+        'image', 'image_variants'
+    ).first()
+    if previous:
+        instance.previous_files = recipe_files(*previous)
+
+
+@receiver(post_save, sender=Recipe)
+def release_replaced_files(instance, **kwargs):
+    replaced = instance.__dict__.pop('previous_files', set()) - recipe_files(
+        instance.image.name, instance.image_variants
+    )
+    if replaced:
+        transaction.on_commit(partial(release_files, replaced))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_files(instance, **kwargs):
+    transaction.on_commit(partial(
+        release_files,
+        recipe_files(instance.image.name, instance.image_variants)
+    ))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Shopping)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+def counted_object_added(sender, instance, created, **kwargs):
+    if created:
+        change_counters(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Shopping)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+def counted_object_removed(sender, instance, **kwargs):
+    change_counters(sender, instance, -1)
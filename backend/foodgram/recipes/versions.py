@@ -0,0 +1,31 @@
+import time
+
+from django.db import connection
+
+from recipes.models import Version
+
+
+def get_versions(*names):
+    values = dict(Version.objects.filter(name__in=names).values_list(
+        'name', 'value'
+    ))
+    return [values.get(name, 0) for name in names]
+
+
+def get_version(name):
+    return get_versions(name)[0]
+
+
+def bump_version(*names):
+    names = sorted(set(names))
+    table = connection.ops.quote_name(Version._meta.db_table)
+    value = time.time_ns()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, value) VALUES '
+            + ', '.join(['(%s, %s)'] * len(names))
+            + f' ON CONFLICT (name) DO UPDATE SET value = CASE '
+            f'WHEN EXCLUDED.value > {table}.value THEN EXCLUDED.value '
+            f'ELSE {table}.value + 1 END',
+            [part for name in names for part in (name, value)]
+        )
@@ -1,21 +1,26 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 
+from recipes.admin_tools import ScalableAdmin, autocomplete_filter
 from users.models import Follow, User
 
 admin.site.unregister(Group)
 
 
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScalableAdmin):
     list_display = (
-        'username', 'first_name', 'last_name', 'email', 'is_active'
+        'username', 'first_name', 'last_name', 'email', 'is_active',
+        'recipes_count', 'followers_count'
     )
-    search_fields = ('first_name', 'email',)
+    search_fields = ('^email', '^username', '^first_name')
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ScalableAdmin):
     list_display = ('user', 'following')
-    list_filter = ('user', 'following',)
+    list_filter = (autocomplete_filter('user', 'Пользователь'),
+                   autocomplete_filter('following', 'Подписан на'))
+    list_select_related = ('user', 'following')
+    autocomplete_fields = ('user', 'following')
 
 
 admin.site.register(Follow, FollowAdmin)
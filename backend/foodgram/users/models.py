@@ -9,6 +9,12 @@ class User(AbstractUser):
     email = models.EmailField(verbose_name='Email', unique=True)
     first_name = models.CharField(verbose_name='Имя', max_length=150)
     last_name = models.CharField(verbose_name='Фамилия', max_length=150)
+    recipes_count = models.IntegerField(
+        default=0, editable=False, verbose_name='Число рецептов'
+    )
+    followers_count = models.IntegerField(
+        default=0, editable=False, verbose_name='Число подписчиков'
+    )
 
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
 